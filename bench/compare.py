@@ -0,0 +1,30 @@
+import argparse, json, sys
+
+# Regression gate between two bench/run.py reports. A level regresses when its p95 latency grew, or its
+# throughput fell, by more than `tolerance`, or when it started returning errors.
+def compare(baseline, current, tolerance=0.10):
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"{'scenario':>10} {'conc':>4} {'p95 ms':>18} {'req/s':>18}")
+    for r in current["results"]:
+        old = before.get((r["scenario"], r["concurrency"]))
+        if old is None: continue
+        problems = []
+        if old["p95_ms"] and r["p95_ms"] and r["p95_ms"] > old["p95_ms"] * (1 + tolerance): problems.append("p95")
+        if r["throughput_rps"] < old["throughput_rps"] * (1 - tolerance): problems.append("throughput")
+        if r["errors"] > old["errors"]: problems.append("errors")
+        print(f"{r['scenario']:>10} {r['concurrency']:>4} {old['p95_ms']!s:>8} -> {r['p95_ms']!s:<8} {old['throughput_rps']:>8} -> {r['throughput_rps']:<8} {' '.join(problems)}")
+        if problems: regressions.append((r["scenario"], r["concurrency"], problems))
+    for scenario, concurrency, problems in regressions:
+        print(f"REGRESSION {scenario} at concurrency {concurrency}: {', '.join(problems)}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports; exits 1 on a regression.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+    with open(args.baseline) as f: baseline = json.load(f)
+    with open(args.current) as f: current = json.load(f)
+    sys.exit(1 if compare(baseline, current, args.tolerance) else 0)
@@ -0,0 +1,60 @@
+import argparse, asyncio, json, time
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+# Stands in for an Ollama server: answers /api/chat with `tokens` words, after `prompt_ms` of "prompt evaluation"
+# and `token_ms` per generated token. At most `parallel` generations run at once (like OLLAMA_NUM_PARALLEL);
+# the rest wait, so throughput is bounded the same way as on a real server.
+def create_app(token_ms=20.0, prompt_ms=50.0, tokens=32, parallel=4):
+    app = FastAPI(title="Fake Ollama")
+    slots = asyncio.Semaphore(parallel)
+
+    def message(model, content, **extra):
+        return json.dumps({"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "message": {"role": "assistant", "content": content}, **extra}) + "\n"
+
+    async def generate(body):
+        model = body.get("model", "fake")
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        # Like Ollama, stop at options.num_predict and report it as done_reason "length".
+        limit = (body.get("options") or {}).get("num_predict") or -1
+        count = tokens if limit < 0 else min(tokens, limit)
+        started = time.perf_counter()
+        async with slots:
+            loaded = time.perf_counter()
+            await asyncio.sleep(prompt_ms / 1000)
+            evaluated = time.perf_counter()
+            for i in range(count):
+                await asyncio.sleep(token_ms / 1000)
+                yield message(model, f"tok{i} ", done=False)
+            finished = time.perf_counter()
+        ns = lambda seconds: int(seconds * 1e9)
+        yield message(model, "", done=True, done_reason="stop" if count == tokens else "length", total_duration=ns(finished - started), load_duration=ns(loaded - started),
+                      prompt_eval_count=max(1, len(prompt) // 4), prompt_eval_duration=ns(evaluated - loaded), eval_count=count, eval_duration=ns(finished - evaluated))
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": []}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        if body.get("stream", True): return StreamingResponse(generate(body), media_type="application/x-ndjson")
+        # Non-streaming clients get the final message with the whole text.
+        parts = [json.loads(line) async for line in generate(body)]
+        final = parts[-1]
+        final["message"]["content"] = "".join(p["message"]["content"] for p in parts)
+        return final
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-ms", type=float, default=20.0, help="delay per generated token")
+    parser.add_argument("--prompt-ms", type=float, default=50.0, help="delay before the first token")
+    parser.add_argument("--tokens", type=int, default=32, help="tokens per response")
+    parser.add_argument("--parallel", type=int, default=4, help="generations served at the same time")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.token_ms, args.prompt_ms, args.tokens, args.parallel), host="127.0.0.1", port=args.port, log_level="warning")
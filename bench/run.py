@@ -0,0 +1,200 @@
+import argparse, asyncio, io, json, math, os, platform, subprocess, sys, tempfile, time, wave
+from datetime import datetime, timezone
+import httpx
+from PIL import Image, ImageDraw
+from bench.compare import compare
+
+LANGS = {"source_language": "English", "target_language": "French", "tone": "Neutral"}
+PARAGRAPH = "WordWeave translates documents chunk by chunk. Each chunk is sent to the model on its own, and the results are joined in order. "
+
+# Every request carries a unique tag so the translation and audio caches never answer for the model.
+def make_document(tag, paragraphs):
+    return "\n\n".join(f"{tag} {i}. {PARAGRAPH * 4}" for i in range(paragraphs)).encode()
+
+def make_image():
+    image = Image.new("RGB", (1200, 800), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(40, 760, 60): draw.text((40, y), "Bench text line for OCR.", fill="black")
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+def make_wav(seconds=3.0, rate=16000):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0\0" * int(seconds * rate))
+    return out.getvalue()
+
+def scenarios(paragraphs):
+    image, audio = make_image(), make_wav()
+
+    async def translate(client, tag):
+        return await client.post("/translate/", json={"text": f"{tag} Hello, how are you today?", **LANGS})
+
+    async def explain(client, tag):
+        return await client.post("/explain_translation/", json={"text": f"{tag} Bonjour, comment allez-vous ?", "source_language": "English", "target_language": "French"})
+
+    async def document(client, tag):
+        return await client.post("/upload_and_translate_document/", files={"file": ("bench.txt", make_document(tag, paragraphs), "text/plain")}, data=LANGS)
+
+    async def image_(client, tag):
+        # The stub OCR returns the same text for every image, so after the first request only OCR is measured.
+        return await client.post("/upload_and_translate_image/", files={"file": ("bench.png", image, "image/png")}, data=LANGS)
+
+    async def stt(client, tag):
+        return await client.post("/speech_to_text/", files={"audio_file": ("bench.wav", audio, "audio/wav")})
+
+    async def voice(client, tag):
+        # Whole pipeline in one request; like the image scenario, the stub's fixed transcript is translated only once.
+        return await client.post("/voice_translate", files={"audio_file": ("bench.wav", audio, "audio/wav")}, data=LANGS)
+
+    async def tts(client, tag):
+        return await client.post("/text_to_speech/", json={"text": f"{tag} This is the first sentence. And this is the second one.", "language": "English"})
+
+    return {"translate": translate, "document": document, "image": image_, "stt": stt, "tts": tts, "voice": voice, "explain": explain}
+
+def percentile(values, p):
+    if not values: return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+def peak_rss_mb(pid):
+    # High-water mark of the backend process; Linux only.
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"): return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+async def run_level(client, name, scenario, concurrency, requests):
+    latencies, errors = [], 0
+    tags = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in tags:
+            started = time.perf_counter()
+            try:
+                (await scenario(client, f"[{name}-c{concurrency}-{i}]")).raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "scenario": name, "concurrency": concurrency, "requests": requests, "errors": errors,
+        "p50_ms": ms(percentile(latencies, 50)), "p95_ms": ms(percentile(latencies, 95)), "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "throughput_rps": round(len(latencies) / wall, 3),
+    }
+
+def start(args, env, port):
+    return subprocess.Popen([sys.executable, "-m", *args, "--port", str(port)], env=env)
+
+async def wait_ready(url, proc, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None: raise RuntimeError(f"{url} exited with code {proc.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200: return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+def stop(proc):
+    proc.terminate()
+    try: proc.wait(10)
+    except subprocess.TimeoutExpired: proc.kill()
+
+async def run_scenario(args, name, scenario, env):
+    # A fresh backend per scenario, so peak RSS and warm caches belong to that scenario alone.
+    backend = start(["bench.server", "--ocr-ms", str(args.ocr_ms), "--whisper-ms", str(args.whisper_ms), "--tts-ms", str(args.tts_ms)], env, args.port)
+    try:
+        base = f"http://127.0.0.1:{args.port}"
+        await wait_ready(f"{base}/health/models", backend)
+        results = []
+        async with httpx.AsyncClient(base_url=base, timeout=httpx.Timeout(args.timeout), limits=httpx.Limits(max_connections=max(args.concurrency))) as client:
+            await run_level(client, f"{name}-warmup", scenario, 1, args.warmup)
+            for concurrency in args.concurrency:
+                result = await run_level(client, name, scenario, concurrency, args.requests)
+                result["peak_rss_mb"] = peak_rss_mb(backend.pid)
+                print(f"{name:>10} c={concurrency:<3} p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms {result['throughput_rps']} req/s errors={result['errors']}", flush=True)
+                results.append(result)
+        return results
+    finally:
+        stop(backend)
+
+def git_commit():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+async def main(args):
+    selected = scenarios(args.paragraphs)
+    names = args.scenarios or list(selected)
+    unknown = set(names) - set(selected)
+    if unknown: sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    fake = start(["bench.fake_ollama", "--token-ms", str(args.token_ms), "--prompt-ms", str(args.prompt_ms), "--tokens", str(args.tokens), "--parallel", str(args.parallel)], os.environ.copy(), args.ollama_port)
+    workdir = tempfile.mkdtemp(prefix="wordweave-bench-")
+    env = {
+        **os.environ,
+        "WORDWEAVE_OLLAMA_URLS": json.dumps([f"http://127.0.0.1:{args.ollama_port}"]),
+        "WORDWEAVE_CACHE_PATH": "", "WORDWEAVE_TM_PATH": "",
+        "WORDWEAVE_JOBS_DB": os.path.join(workdir, "jobs.sqlite3"),
+        "WORDWEAVE_JOBS_DIR": os.path.join(workdir, "jobs"),
+    }
+    try:
+        await wait_ready(f"http://127.0.0.1:{args.ollama_port}/api/tags", fake)
+        results = [r for name in names for r in await run_scenario(args, name, selected[name], env)]
+    finally:
+        stop(fake)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "ollama": {"token_ms": args.token_ms, "prompt_ms": args.prompt_ms, "tokens": args.tokens, "parallel": args.parallel},
+            "stubs": {"ocr_ms": args.ocr_ms, "whisper_ms": args.whisper_ms, "tts_ms": args.tts_ms},
+            "requests": args.requests, "paragraphs": args.paragraphs,
+            "settings": {k: v for k, v in os.environ.items() if k.startswith("WORDWEAVE_")},
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f: json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        if compare(baseline, report, args.tolerance): sys.exit(1)
+
+def csv(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the WordWeave backend against a fake Ollama server and stubbed local models.")
+    parser.add_argument("--scenarios", type=csv(str), help="comma separated; default: translate,document,image,stt,tts,voice,explain")
+    parser.add_argument("--concurrency", type=csv(int), default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=50, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=3, help="unmeasured requests before each scenario")
+    parser.add_argument("--paragraphs", type=int, default=20, help="paragraphs in the generated document")
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--prompt-ms", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--parallel", type=int, default=4, help="generations the fake Ollama serves at once")
+    parser.add_argument("--ocr-ms", type=float, default=200.0)
+    parser.add_argument("--whisper-ms", type=float, default=300.0)
+    parser.add_argument("--tts-ms", type=float, default=50.0)
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds per request")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--baseline", help="earlier results to compare against; exits 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression of p95 and throughput")
+    asyncio.run(main(parser.parse_args()))
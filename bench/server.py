@@ -0,0 +1,50 @@
+import argparse, time
+from types import SimpleNamespace
+import uvicorn
+import fastapi_backend as backend
+from tts_engine import TTSBackend
+
+# Fixed-cost replacements for the local models, so a run measures the service around them rather than
+# EasyOCR, Whisper or gTTS themselves. They are installed through the model registry and the TTS engine,
+# the same hooks the real models use.
+class StubOCR:
+    def __init__(self, ms): self.ms = ms
+
+    def readtext(self, image, paragraph=False, **kwargs):
+        time.sleep(self.ms / 1000)
+        return [([[0, 0], [200, 0], [200, 20], [0, 20]], "Text recognized from the bench image."), ([[0, 40], [200, 40], [200, 60], [0, 60]], "A second paragraph.")]
+
+class StubWhisper:
+    def __init__(self, ms): self.ms = ms
+
+    def transcribe(self, audio, **kwargs):
+        if hasattr(audio, "read"): audio.read()
+        time.sleep(self.ms / 1000)
+        segments = [SimpleNamespace(start=0.0, end=1.0, text=" Hello from the bench."), SimpleNamespace(start=1.0, end=2.0, text=" How are you?")]
+        return iter(segments), SimpleNamespace(duration=2.0, language="en", language_probability=1.0)
+
+class StubTTS(TTSBackend):
+    name, media_type, suffix = "bench", "application/octet-stream", ".bin"
+
+    def __init__(self, ms): self.ms = ms
+
+    def synthesize(self, text, lang):
+        time.sleep(self.ms / 1000)
+        return b"\0" * 160 * len(text)
+
+def install_stubs(ocr_ms, whisper_ms, tts_ms):
+    # Per-language readers are registered on demand through load_ocr, so it is replaced as well.
+    backend.load_ocr = lambda codes=None: StubOCR(ocr_ms)
+    backend.models.register("ocr", lambda: StubOCR(ocr_ms))
+    backend.models.register("whisper", lambda: StubWhisper(whisper_ms))
+    backend.tts_engine.backend = StubTTS(tts_ms)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ocr-ms", type=float, default=200.0)
+    parser.add_argument("--whisper-ms", type=float, default=300.0)
+    parser.add_argument("--tts-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    install_stubs(args.ocr_ms, args.whisper_ms, args.tts_ms)
+    uvicorn.run(backend.app, host="127.0.0.1", port=args.port, log_level="warning")
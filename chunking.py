@@ -0,0 +1,62 @@
+import re
+
+# Rough token estimate for Gemma-style tokenizers; good enough for sizing chunks.
+CHARS_PER_TOKEN = 4
+
+SENTENCE_END = re.compile(r'(?<=[.!?।۔。！？])\s+')
+SENTENCE_DONE = re.compile(r'[.!?।۔。！？]["\'”’)\]]*$')
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def split_sentences(text):
+    return [s for s in SENTENCE_END.split(text.strip()) if s]
+
+def finished_sentences(text, max_chars):
+    # Splits text that is still growing (e.g. a live transcript) into the sentences that have ended and
+    # the unfinished rest. Unpunctuated speech is cut after max_chars so it never waits for the end.
+    sentences = split_sentences(text)
+    if sentences and not SENTENCE_DONE.search(sentences[-1]) and len(sentences[-1]) < max_chars:
+        return sentences[:-1], sentences[-1]
+    return sentences, ""
+
+def _hard_split(text, max_tokens):
+    # Last resort for a single "sentence" larger than the budget (tables, run-on OCR text).
+    step = max_tokens * CHARS_PER_TOKEN
+    words, out, cur = text.split(), [], ""
+    for w in words:
+        if cur and len(cur) + len(w) + 1 > step:
+            out.append(cur)
+            cur = ""
+        cur = f"{cur} {w}" if cur else w
+    if cur: out.append(cur)
+    return out
+
+def _units(page, max_tokens):
+    for para in re.split(r'\n\s*\n', page):
+        para = " ".join(para.split())
+        if not para: continue
+        if estimate_tokens(para) <= max_tokens:
+            yield para, "\n\n"
+            continue
+        sep = "\n\n"
+        for sent in split_sentences(para):
+            for piece in ([sent] if estimate_tokens(sent) <= max_tokens else _hard_split(sent, max_tokens)):
+                yield piece, sep
+                sep = " "
+
+def chunk_page(page, max_tokens):
+    chunks, cur, cur_tokens = [], "", 0
+    for unit, sep in _units(page, max_tokens):
+        t = estimate_tokens(unit)
+        if cur and cur_tokens + t > max_tokens:
+            chunks.append(cur)
+            cur, cur_tokens = "", 0
+        cur = f"{cur}{sep}{unit}" if cur else unit
+        cur_tokens += t
+    if cur: chunks.append(cur)
+    return chunks
+
+def chunk_pages(pages, max_tokens):
+    # Chunks never span pages, so an edit on one page leaves the other pages' chunks unchanged.
+    return [c for page in pages for c in chunk_page(page, max_tokens)]
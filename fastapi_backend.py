@@ -1,108 +1,944 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from pydantic import BaseModel
-from langchain_ollama import ChatOllama
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-import easyocr, io, os, PyPDF2, base64, tempfile
-from gtts import gTTS
-from faster_whisper import WhisperModel
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+import os, PyPDF2, base64, asyncio, json, shutil, tempfile, uuid, codecs
+from contextlib import asynccontextmanager
 import re 
+from chunking import chunk_page, chunk_pages, estimate_tokens, finished_sentences
+from translation_cache import TranslationCache, cache_key
+from translation_memory import TranslationMemory, read_tmx, write_tmx
+from xml.etree.ElementTree import ParseError
+from inference_pool import InferencePool, PoolBusy
+from model_registry import ModelRegistry, cuda_available, ctranslate2_cuda_available, resolve_device
+from speech_stream import UtteranceSegmenter, SAMPLE_RATE
+from tts_engine import TTSEngine, AudioCache, TTS_BACKENDS
+from ollama_pool import OllamaPool, PooledChain, track_usage
+from generation import GenerationProfile, translation_tokens
+from job_queue import JobStore, JobRunner, remove_input
+from ocr_pipeline import IMAGE_EXTENSIONS, open_images, downscale, page_needs_ocr, page_images, ocr_blocks
+from metrics import Metrics, MetricsMiddleware
+from languages import AUTO, LANGUAGES, LANGUAGES_BY_NAME, SUPPORTED_LANGUAGES, SUPPORTED_TONES, LanguageName, SourceLanguage, Tone, from_code, ocr_codes
+import language_id
 
-app = FastAPI(title="My Translator")
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="WORDWEAVE_")
+    ollama_urls: list[str] = ["http://127.0.0.1:11434"]  # servers hosting the same models
+    ollama_health_interval: float = 15.0  # seconds between health checks of each server
+    ollama_num_ctx: int = 8192        # context window of every call; one value per model, since Ollama reloads a model when it changes
+    ollama_keep_alive: str | None = "30m"  # how long Ollama keeps a model loaded after a call; "-1m" pins it, empty uses Ollama's default
+    predict_headroom: float = 2.0     # num_predict allowed per call, as a multiple of the expected output length
+    explain_max_tokens: int = 1024    # num_predict for explanations, which have no input to size them from
+    chunk_tokens: int = 1024          # token budget per document chunk sent to the model
+    chunk_concurrency: int = 4        # document chunks translated at the same time
+    chunk_retries: int = 2            # extra attempts per chunk before the request fails
+    chunk_retry_backoff: float = 1.0  # seconds, doubled on every retry
+    max_upload_bytes: int = 200 * 1024 * 1024  # larger uploads are rejected with 413
+    batch_segments: int = 20          # short strings packed into one prompt by /translate/batch
+    batch_concurrency: int = 4        # packed prompts in flight at the same time per batch request
+    ocr_workers: int = 1              # parallel EasyOCR jobs
+    ocr_queue: int = 8                # OCR jobs allowed to wait before requests get 429
+    ocr_timeout: float = 120.0        # seconds
+    ocr_max_side: int = 2000          # pixels; larger photos are downscaled before OCR
+    ocr_target_dpi: int = 200         # resolution scanned PDF pages are rescaled to
+    ocr_min_page_chars: int = 20      # PDF pages with less extractable text than this are OCR'd
+    whisper_workers: int = 1
+    whisper_queue: int = 4
+    whisper_timeout: float = 600.0
+    ocr_device: str = "auto"          # auto | cuda | cpu
+    ocr_languages: list[str] = ["English", "Hindi"]  # EasyOCR packs to load; each one costs memory and load time
+    ocr_per_language: bool = True     # images with an explicit source language get a reader with only that pack (plus English)
+    ocr_language_readers: int = 3     # per-language readers kept loaded; the least recently used is unloaded first
+    detect_chars: int = 1000          # characters of a document read before its language is identified in Auto mode
+    whisper_model: str = "small"
+    whisper_device: str = "auto"      # auto | cuda | cpu
+    whisper_compute_type: str = "auto"  # auto picks float16 on cuda and int8 on cpu
+    tts_backend: str = "gtts"         # gtts (online) | espeak (offline, needs espeak-ng installed)
+    tts_cache_bytes: int = 64 * 1024 * 1024
+    tts_workers: int = 2
+    tts_queue: int = 16
+    tts_timeout: float = 60.0
+    tts_lookahead: int = 2            # sentences synthesized ahead of the one being streamed
+    voice_max_sentence_chars: int = 300  # /voice_translate cuts unpunctuated speech here instead of waiting for a sentence end
+    stream_min_silence: float = 0.5   # seconds of silence that end an utterance on /ws/speech_to_text
+    stream_max_utterance: float = 15.0  # seconds; longer speech is transcribed without waiting for a pause
+    preload_models: list[str] = []    # e.g. ["ocr", "whisper"]; others load on first use
+    model_warmup: bool = True         # run one tiny inference right after loading
+    jobs_db: str = "jobs.sqlite3"
+    jobs_dir: str = "jobs"            # uploaded inputs of background jobs, removed once a job finishes or fails
+    job_retention: float = 7 * 86400  # seconds a finished or failed job and its result are kept
+    job_workers: int = 2              # background jobs processed at the same time
+    job_audio_timeout: float = 4 * 3600.0  # seconds; transcription time allowed for one audio job
+    cache_path: str = "translation_cache.sqlite3"  # empty string keeps the cache in memory only
+    cache_memory_entries: int = 2048
+    cache_disk_entries: int = 200_000
+    cache_ttl: float = 30 * 86400     # seconds
+    tm_path: str = "translation_memory.sqlite3"  # empty string keeps the translation memory in memory only
+    tm_fuzzy_threshold: float = 0.75  # similarity from which an earlier segment is passed to the model as a reference
+    tm_min_chars: int = 20            # shorter segments are never used as references
+    tm_max_entries: int = 500_000     # the model's own segments are evicted beyond this; imported ones are kept
+    tm_max_age: float = 180 * 86400   # seconds; older model segments are dropped
+    trace_requests: bool = False      # log one JSON line per request with the time spent in each stage
 
-LANGUAGE_NAMES = sorted(["English", "French", "Punjabi", "Spanish", "German", "Hindi", "Bengali", "Arabic", "Japanese", "Korean", "Russian", "Portuguese", "Italian", "Dutch", "Swedish", "Polish", "Turkish", "Vietnamese", "Thai", "Indonesian", "Malay", "Urdu", "Persian", "Ukrainian", "Hebrew", "Greek", "Czech", "Danish", "Finnish", "Norwegian", "Romanian", "Hungarian", "Bulgarian", "Slovak", "Slovenian", "Lithuanian", "Latvian", "Estonian", "Croatian", "Serbian", "Bosnian", "Albanian", "Assamese", "Azerbaijani", "Belarusian", "Burmese", "Catalan", "Cebuano", "Simplified Chinese", "Traditional Chinese", "Cantonese", "Zulu"])
-TONE_OPTIONS = ["Neutral", "Formal", "Informal", "Friendly", "Sarcastic", "Angry", "Relaxed", "Enthusiastic"]
-LANG_MAP = {"English": "en", "French": "fr", "Punjabi": "pa", "Spanish": "es", "Persian": "fa", "German": "de", "Hindi": "hi", "Bengali": "bn", "Arabic": "ar", "Japanese": "ja", "Korean": "ko", "Russian": "ru", "Portuguese": "pt", "Italian": "it", "Dutch": "nl", "Swedish": "sv", "Polish": "pl", "Turkish": "tr", "Vietnamese": "vi", "Thai": "th", "Indonesian": "id", "Malay": "ms", "Urdu": "ur", "Ukrainian": "uk", "Hebrew": "iw", "Greek": "el", "Czech": "cs", "Danish": "da", "Finnish": "fi", "Norwegian": "no", "Romanian": "ro", "Hungarian": "hu", "Bulgarian": "bg", "Slovak": "sk", "Slovenian": "sl", "Lithuanian": "lt", "Latvian": "lv", "Estonian": "et", "Croatian": "hr", "Serbian": "sr", "Bosnian": "bs", "Albanian": "sq", "Assamese": "as", "Azerbaijani": "az", "Belarusian": "be", "Burmese": "my", "Catalan": "ca", "Cebuano": "ceb", "Simplified Chinese": "zh-CN", "Traditional Chinese": "zh-TW", "Cantonese": "yue", "Zulu": "zu"}
+    @field_validator("ocr_languages")
+    @classmethod
+    def check_ocr_languages(cls, names):
+        ocr_codes(names)
+        return names
 
-class TranslateRequest(BaseModel): text: str; source_language: str; target_language: str; tone: str
-class TranslateResponse(BaseModel): translated_text: str
-class ExplainRequest(BaseModel): text: str; source_language: str; target_language: str
-class ExplainResponse(BaseModel): explanation: str
-class TTSRequest(BaseModel): text: str; language: str
+settings = Settings()
+metrics = Metrics()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Preloading runs in the background so the API (and /translate/) is up immediately.
+    app.state.preload = asyncio.create_task(models.preload(settings.preload_models))
+    health_checks = [asyncio.create_task(pool.health_loop()) for pool in ollama_pools.values()]
+    job_runner.start()
+    yield
+    for task in health_checks: task.cancel()
+    await job_runner.stop()
+
+app = FastAPI(title="My Translator", lifespan=lifespan)
+
+@app.middleware("http")
+async def limit_upload_size(request, call_next):
+    # Reject oversized uploads from the header, before the body is spooled at all.
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > settings.max_upload_bytes:
+        return JSONResponse({"detail": f"Upload larger than {settings.max_upload_bytes} bytes."}, status_code=413)
+    return await call_next(request)
+
+app.add_middleware(MetricsMiddleware, metrics=metrics, trace=settings.trace_requests)
+
+class TranslateRequest(BaseModel): text: str; source_language: SourceLanguage; target_language: LanguageName; tone: Tone
+class GenerationStats(BaseModel): calls: int; prompt_tokens: int; completion_tokens: int; prompt_seconds: float; eval_seconds: float; load_seconds: float; truncated: int; tokens_per_second: float
+class TranslateResponse(BaseModel): translated_text: str; detected_language: str | None = None; usage: GenerationStats | None = None
+class ExplainRequest(BaseModel): text: str; source_language: LanguageName; target_language: LanguageName
+class ExplainResponse(BaseModel): explanation: str; usage: GenerationStats | None = None
+class TTSRequest(BaseModel): text: str; language: LanguageName
 class TTSResponse(BaseModel): audio_base64: str
-class STTResponse(BaseModel): transcribed_text: str
+class STTResponse(BaseModel): transcribed_text: str; detected_language: str | None = None
+class JobResponse(BaseModel): job_id: str; kind: str; status: str; stage: str | None = None; progress: float = 0.0; result: str | None = None; partial_result: str | None = None; error: str | None = None; source_language: str | None = None
+class BatchItem(BaseModel): text: str; source_language: SourceLanguage; target_languages: list[LanguageName]; tone: Tone
+class BatchRequest(BaseModel): items: list[BatchItem]
+class BatchResult(BaseModel): translations: dict[str, str]; detected_language: str | None = None
+class BatchResponse(BaseModel): results: list[BatchResult]; usage: GenerationStats | None = None
+class TMImportResponse(BaseModel): imported: int
+class LanguageInfo(BaseModel): name: str; code: str; ocr: bool; speech_to_text: bool; text_to_speech: bool
+
+def load_ocr(codes=None):
+    import easyocr
+    return easyocr.Reader(codes or ocr_codes(settings.ocr_languages), gpu=resolve_device(settings.ocr_device, cuda_available) == "cuda")
+
+def load_whisper():
+    from faster_whisper import WhisperModel
+    device = resolve_device(settings.whisper_device, ctranslate2_cuda_available)
+    compute_type = settings.whisper_compute_type
+    if compute_type == "auto": compute_type = "float16" if device == "cuda" else "int8"
+    return WhisperModel(settings.whisper_model, device=device, compute_type=compute_type)
 
-ocr_reader = easyocr.Reader(['en', 'hi'], gpu=True)
+def warmup_ocr(reader):
+    import numpy as np
+    reader.readtext(np.full((32, 128, 3), 255, dtype=np.uint8))
 
-def build_chain(model, prompt):
-    return ChatPromptTemplate.from_messages([("user", prompt)]) | ChatOllama(model=model) | StrOutputParser()
+def warmup_whisper(model):
+    import numpy as np
+    segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32))
+    list(segments)
 
-translation_chain = build_chain("Gemma_Translator", "Translate the following {source_language} text to {target_language} in a {tone} tone:\n\n{text_to_translate}")
-explanation_chain = build_chain("Gemma_Translator", "Explain the cultural nuances and word choices for this translation from {source_language} to {target_language}:\n\n{text_to_explain}")
+models = ModelRegistry(warmup=settings.model_warmup, max_evictable=settings.ocr_language_readers)
+models.register("ocr", load_ocr, warmup_ocr)
+models.register("whisper", load_whisper, warmup_whisper)
 
-whisper_model = WhisperModel("small", device="cuda")  # Change device to "cpu" if no GPU
+ollama_pools = {}
+
+def build_chain(model, prompt, expected_tokens=None, max_predict=None):
+    # Chains for the same model share one pool, so routing sees all of that model's traffic.
+    if model not in ollama_pools: ollama_pools[model] = OllamaPool(settings.ollama_urls, model, settings.ollama_health_interval, settings.ollama_keep_alive or None)
+    profile = GenerationProfile(num_ctx=settings.ollama_num_ctx, headroom=settings.predict_headroom, max_predict=max_predict)
+    return PooledChain(prompt, ollama_pools[model], profile, expected_tokens)
+
+def expected_translation(key):
+    return lambda inputs: translation_tokens(inputs[key], inputs["source_language"], inputs["target_language"])
+
+# Prompts start with their fixed instructions and end with the text, so consecutive calls share the longest
+# possible prefix (the Modelfile's system prompt plus the instructions) and Ollama can reuse its KV cache for it.
+TRANSLATION_MODEL = "Gemma_Translator"
+TRANSLATION_PROMPT = "Translate the text below.\nFrom: {source_language}\nTo: {target_language}\nTone: {tone}\n\n{text_to_translate}"
+translation_chain = build_chain(TRANSLATION_MODEL, TRANSLATION_PROMPT, expected_translation("text_to_translate"))
+REFERENCE_PROMPT = "Translate the text below. A similar passage was translated before; keep its wording wherever the text is unchanged.\nFrom: {source_language}\nTo: {target_language}\nTone: {tone}\n\nEarlier passage:\n{reference_source}\n\nIts translation:\n{reference_target}\n\nText to translate:\n{text_to_translate}"
+reference_chain = build_chain(TRANSLATION_MODEL, REFERENCE_PROMPT, expected_translation("text_to_translate"))
+BATCH_PROMPT = "Translate each numbered segment below. Reply with every [[n]] marker on its own line followed by the translation of that segment, in the same order, without merging or skipping segments.\nFrom: {source_language}\nTo: {target_language}\nTone: {tone}\n\n{segments}"
+batch_chain = build_chain(TRANSLATION_MODEL, BATCH_PROMPT, expected_translation("segments"))
+# Auto mode, for text too short or too mixed to identify locally ("OK", "Save"): the model works out the language.
+AUTO_PROMPT = "Translate the text below. Its language is not given; work it out from the text.\nTo: {target_language}\nTone: {tone}\n\n{text_to_translate}"
+auto_chain = build_chain(TRANSLATION_MODEL, AUTO_PROMPT, expected_translation("text_to_translate"))
+explanation_chain = build_chain("Gemma_Translator", "Explain the cultural nuances and word choices of this translation.\nFrom: {source_language}\nTo: {target_language}\n\n{text_to_explain}",
+                                max_predict=settings.explain_max_tokens)
+
+translation_cache = TranslationCache(settings.cache_path, settings.cache_memory_entries, settings.cache_disk_entries, settings.cache_ttl)
+translation_memory = TranslationMemory(settings.tm_path, settings.tm_fuzzy_threshold, settings.tm_min_chars, max_entries=settings.tm_max_entries, max_age=settings.tm_max_age)
+
+ocr_pool = InferencePool("ocr", settings.ocr_workers, settings.ocr_queue, settings.ocr_timeout)
+whisper_pool = InferencePool("whisper", settings.whisper_workers, settings.whisper_queue, settings.whisper_timeout)
+tts_pool = InferencePool("tts", settings.tts_workers, settings.tts_queue, settings.tts_timeout)
+tts_engine = TTSEngine(TTS_BACKENDS[settings.tts_backend](), AudioCache(settings.tts_cache_bytes), lambda: metrics.stage("tts"))
+
+async def run_inference(pool, fn, *args, **kwargs):
+    try:
+        return await pool.run(fn, *args, **kwargs)
+    except PoolBusy as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "5"})
+    except asyncio.TimeoutError:
+        raise HTTPException(504, f"{pool.name} inference timed out after {pool.timeout:.0f}s.")
 
+def detect_speech(audio):
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    return get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=300))
+
+def ocr_model(source):
+    # A reader for one script loads a single recognizer and runs faster than the configured multi-pack reader.
+    # Auto mode, and languages EasyOCR cannot read, use the configured reader.
+    pack = LANGUAGES_BY_NAME[source].ocr if source in LANGUAGES_BY_NAME else None
+    if not settings.ocr_per_language or not pack: return "ocr"
+    codes = [pack] if pack == "en" else [pack, "en"]  # every EasyOCR pack combines with English
+    if set(codes) == set(ocr_codes(settings.ocr_languages)): return "ocr"
+    name = f"ocr:{pack}"
+    if name not in models:
+        models.register(name, lambda: load_ocr(codes), warmup_ocr, evictable=True)
+    return name
+
+@metrics.stage("ocr")
+def recognize(image, model="ocr"):
+    # Layout blocks come back in reading order and are kept as paragraphs so translation goes block by block.
+    return "\n\n".join(ocr_blocks(models.get(model), downscale(image, settings.ocr_max_side)))
+
+def whisper_language(source):
+    lang = LANGUAGES_BY_NAME.get(source)
+    return lang.whisper if lang else None
+
+def language_from_code(code):
+    lang = from_code(code)
+    return lang.name if lang else None
+
+@metrics.stage("whisper")
+def transcribe(audio, source=None):
+    # Returns (text, language). A known source language skips Whisper's own language detection pass.
+    # faster-whisper decodes lazily while the segments are iterated, so the join has to run in the worker too.
+    segments, info = models.get("whisper").transcribe(audio, language=whisper_language(source))
+    text = " ".join(segment.text for segment in segments).strip()
+    return text, source if source in SUPPORTED_LANGUAGES else language_from_code(info.language)
+
+@metrics.stage("validate_langs")
 def validate_langs(source, target, tone=None):
     if source == target: raise HTTPException(400, "Source and target languages cannot be the same.")
-    if source not in LANGUAGE_NAMES: raise HTTPException(400, f"Unsupported source language: {source}")
-    if target not in LANGUAGE_NAMES: raise HTTPException(400, f"Unsupported target language: {target}")
-    if tone and tone not in TONE_OPTIONS: raise HTTPException(400, f"Unsupported tone: {tone}")
+    # Request models already restrict these; the checks cover callers that pass plain strings, such as resumed jobs.
+    if source != AUTO and source not in SUPPORTED_LANGUAGES: raise HTTPException(400, f"Unsupported source language: {source}")
+    if target not in SUPPORTED_LANGUAGES: raise HTTPException(400, f"Unsupported target language: {target}")
+    if tone and tone not in SUPPORTED_TONES: raise HTTPException(400, f"Unsupported tone: {tone}")
+
+@metrics.stage("language_id")
+def identify(text):
+    return language_id.detect(text)
+
+def resolve_source(text, source):
+    # Returns (source, detected_language); detected_language is only set in Auto mode. Text the local
+    # detector can't settle stays AUTO and is translated with AUTO_PROMPT.
+    if source != AUTO: return source, None
+    detected = identify(text)
+    return (detected, detected) if detected else (AUTO, None)
+
+def translation_key(text, source, target, tone):
+    return cache_key(text, source, target, tone, TRANSLATION_MODEL, AUTO_PROMPT if source == AUTO else TRANSLATION_PROMPT)
+
+def translation_inputs(text, source, target, tone):
+    return {"text_to_translate": text, "source_language": source, "target_language": target, "tone": tone}
+
+async def plan_translation(text, source, target, tone):
+    # Returns (translation, None, None) when one is already known, else the chain and inputs to generate it with.
+    cached = await asyncio.to_thread(translation_cache.get, translation_key(text, source, target, tone))
+    if cached is not None: return cached, None, None
+    inputs = translation_inputs(text, source, target, tone)
+    # The translation memory is kept per language pair, so text of unknown language goes past it.
+    if source == AUTO: return None, auto_chain, inputs
+    with metrics.stage("memory_lookup"):
+        match = await asyncio.to_thread(translation_memory.lookup, text, source, target, tone)
+    if match is None: return None, translation_chain, inputs
+    if match.exact: return match.target, None, None
+    # A close earlier segment (e.g. the previous revision of a contract) goes into the prompt as a reference,
+    # unless the two passages together leave too little of the context for the translation.
+    with_reference = {**inputs, "reference_source": match.source, "reference_target": match.target}
+    return (None, reference_chain, with_reference) if reference_chain.fits(with_reference) else (None, translation_chain, inputs)
+
+def remember_translations(pairs, source, target, tone):
+    for text, out in pairs:
+        translation_cache.set(translation_key(text, source, target, tone), out)
+        if source != AUTO: translation_memory.add(text, out, source, target, tone)
+
+def known_translation(text, source, target, tone):
+    cached = translation_cache.get(translation_key(text, source, target, tone))
+    if cached is not None or source == AUTO: return cached
+    return translation_memory.exact(text, source, target, tone)
+
+async def translate_text(text, source, target, tone):
+    if estimate_tokens(text) > settings.chunk_tokens:
+        chunks = chunk_page(text, settings.chunk_tokens)
+        if len(chunks) > 1:
+            # Longer than a document chunk (a long /translate/ body or batch item): translated piece by piece
+            # so the prompt and its translation always fit the model's context.
+            sem = asyncio.Semaphore(settings.chunk_concurrency)
+            return "\n\n".join(await asyncio.gather(*(translate_chunk(chunk, source, target, tone, sem) for chunk in chunks)))
+    known, chain, inputs = await plan_translation(text, source, target, tone)
+    if known is not None: return known
+    with metrics.stage("translate"):
+        out = await chain.ainvoke(inputs)
+    out = out.strip()
+    await asyncio.to_thread(remember_translations, [(text, out)], source, target, tone)
+    return out
 
 async def process_translation_request(text, source, target, tone):
     validate_langs(source, target, tone)
-    out = await translation_chain.ainvoke({"text_to_translate": text, "source_language": source, "target_language": target, "tone": tone})
-    return TranslateResponse(translated_text=out.strip())
+    source, detected = resolve_source(text, source)
+    usage = track_usage()
+    # Text already in the target language needs no model call at all.
+    if source == target: return TranslateResponse(translated_text=text, detected_language=detected, usage=usage.stats())
+    translated = await translate_text(text, source, target, tone)
+    return TranslateResponse(translated_text=translated, detected_language=detected, usage=usage.stats())
+
+async def translate_chunk(chunk, source, target, tone, sem):
+    async with sem:
+        for attempt in range(settings.chunk_retries + 1):
+            try:
+                return await translate_text(chunk, source, target, tone)
+            except Exception:
+                if attempt == settings.chunk_retries: raise
+                await asyncio.sleep(settings.chunk_retry_backoff * 2 ** attempt)
+
+async def replay(head, pages):
+    for page in head: yield page
+    async for page in pages: yield page
+
+async def resolve_pages(pages, source):
+    # In Auto mode the first pages are read ahead until there is enough text to identify the language,
+    # then handed back in front of the rest. Returns (pages, source, detected_language).
+    if source != AUTO: return pages, source, None
+    head, size = [], 0
+    async for page in pages:
+        head.append(page)
+        size += len(page.strip())
+        if size >= settings.detect_chars: break
+    if not size: raise HTTPException(400, "No readable text.")
+    source, detected = resolve_source("\n\n".join(head), source)
+    return replay(head, pages), source, detected
+
+async def process_document_request(pages, source, target, tone):
+    # `pages` is an async iterator: each page's chunks start translating as soon as the page has been read.
+    validate_langs(source, target, tone)
+    pages, source, detected = await resolve_pages(pages, source)
+    usage = track_usage()
+    if source == target:
+        text = "\n\n".join([page.strip() async for page in pages if page.strip()])
+        return TranslateResponse(translated_text=text, detected_language=detected, usage=usage.stats())
+    sem = asyncio.Semaphore(settings.chunk_concurrency)
+    tasks = []
+    try:
+        async for page in pages:
+            tasks += [asyncio.create_task(translate_chunk(c, source, target, tone, sem)) for c in chunk_page(page, settings.chunk_tokens)]
+        if not tasks: raise HTTPException(400, "No readable text.")
+        # gather keeps results in chunk order regardless of completion order
+        parts = await asyncio.gather(*tasks)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(502, f"Translation failed: {e}")
+    finally:
+        for task in tasks: task.cancel()
+    return TranslateResponse(translated_text="\n\n".join(parts), detected_language=detected, usage=usage.stats())
+
+BATCH_MARKER = re.compile(r'^\s*\[\[(\d+)\]\]\s*', re.M)
+
+def split_batch_output(out, n):
+    parts = BATCH_MARKER.split(out)
+    found = {int(parts[i]): parts[i + 1].strip() for i in range(1, len(parts) - 1, 2)}
+    if sorted(found) != list(range(1, n + 1)) or not all(found.values()): return None
+    return [found[i] for i in range(1, n + 1)]
+
+def pack_segments(texts):
+    # Groups short strings into prompts of at most batch_segments items and chunk_tokens tokens; long ones go alone.
+    packs, cur, cur_tokens = [], [], 0
+    for text in texts:
+        t = estimate_tokens(text)
+        if cur and (len(cur) == settings.batch_segments or cur_tokens + t > settings.chunk_tokens):
+            packs.append(cur)
+            cur, cur_tokens = [], 0
+        cur.append(text)
+        cur_tokens += t
+    if cur: packs.append(cur)
+    return packs
+
+async def translate_pack(pack, source, target, tone, sem):
+    if len(pack) == 1: return [await translate_chunk(pack[0], source, target, tone, sem)]
+    segments = "\n\n".join(f"[[{i}]]\n{text}" for i, text in enumerate(pack, 1))
+    try:
+        async with sem:
+            with metrics.stage("translate_batch"):
+                out = await batch_chain.ainvoke({"segments": segments, "source_language": source, "target_language": target, "tone": tone})
+        parts = split_batch_output(out, len(pack))
+    except Exception:
+        parts = None
+    if parts is None:
+        # The model dropped or merged markers; translate this pack one string at a time instead.
+        return await asyncio.gather(*(translate_chunk(text, source, target, tone, sem) for text in pack))
+    await asyncio.to_thread(remember_translations, list(zip(pack, parts)), source, target, tone)
+    return parts
+
+def fill_known(groups):
+    for (source, target, tone), texts in groups.items():
+        for text in texts: texts[text] = known_translation(text, source, target, tone)
+
+async def process_batch_request(items):
+    groups, sources = {}, []
+    for i, item in enumerate(items):
+        try:
+            source, detected = resolve_source(item.text, item.source_language)
+            sources.append((source, detected))
+            for target in item.target_languages:
+                if detected and source == target: continue
+                validate_langs(source, target, item.tone)
+                groups.setdefault((source, target, item.tone), {}).setdefault(item.text, None)
+        except HTTPException as e: raise HTTPException(e.status_code, f"Item {i}: {e.detail}")
+    # Identical items within a language pair are translated once; cached or memorized strings never reach the model.
+    # The lookups hit SQLite for every unique string, so they run off the event loop.
+    await asyncio.to_thread(fill_known, groups)
+    jobs = []
+    for (source, target, tone), texts in groups.items():
+        pending = [text for text, out in texts.items() if out is None]
+        # Strings of unknown language can't share a prompt that names one, so each goes alone.
+        packs = pack_segments(pending) if source != AUTO else [[text] for text in pending]
+        jobs += [(texts, pack, source, target, tone) for pack in packs]
+    sem = asyncio.Semaphore(settings.batch_concurrency)
+    usage = track_usage()
+    try:
+        outputs = await asyncio.gather(*(translate_pack(pack, source, target, tone, sem) for _, pack, source, target, tone in jobs))
+    except Exception as e:
+        raise HTTPException(502, f"Translation failed: {e}")
+    for (texts, pack, *_), parts in zip(jobs, outputs): texts.update(zip(pack, parts))
+    return BatchResponse(results=[
+        BatchResult(translations={t: item.text if t == source else groups[(source, t, item.tone)][item.text] for t in item.target_languages}, detected_language=detected)
+        for item, (source, detected) in zip(items, sources)], usage=usage.stats())
+
+async def ocr_images(images, model="ocr"):
+    # Pages go to the OCR pool in parallel, but never more at once than there are workers, so one
+    # large scan cannot fill the queue and push other requests into 429s.
+    sem = asyncio.Semaphore(settings.ocr_workers)
+    async def one(image):
+        async with sem: return await run_inference(ocr_pool, recognize, image, model)
+    return await asyncio.gather(*(one(image) for image in images))
+
+def check_upload(file):
+    # Uploads without a Content-Length header get past the middleware; Starlette knows the size once spooled.
+    if file.size is not None and file.size > settings.max_upload_bytes:
+        raise HTTPException(413, f"Upload larger than {settings.max_upload_bytes} bytes.")
+
+async def ocr_uploads(files, model="ocr"):
+    for file in files:
+        if not file.filename.lower().endswith(IMAGE_EXTENSIONS): raise HTTPException(400, "Only image files supported.")
+        check_upload(file)
+        # PIL decodes straight from the spooled upload, so the encoded image is never copied into memory.
+        try: images = await run_inference(ocr_pool, open_images, file.file)
+        except OSError: raise HTTPException(400, f"Could not read image: {file.filename}")
+        for page in await ocr_images(images, model): yield page
+
+@metrics.stage("pdf_extract")
+def read_pdf_page(reader, i):
+    page = reader.pages[i]
+    text = page.extract_text() or ""
+    # Only pages without a usable text layer (scans) have their images pulled out for OCR.
+    images = page_images(page, settings.ocr_target_dpi) if page_needs_ocr(text, settings.ocr_min_page_chars) else []
+    return text, images
+
+async def pdf_pages(stream, model="ocr"):
+    # PyPDF2 parses objects on demand, so pages are read from the spooled upload one at a time.
+    try:
+        reader = await asyncio.to_thread(PyPDF2.PdfReader, stream)
+        count = await asyncio.to_thread(len, reader.pages)
+    except PyPDF2.errors.PdfReadError as e:
+        raise HTTPException(400, f"Could not read PDF: {e}")
+    for i in range(count):
+        text, images = await asyncio.to_thread(read_pdf_page, reader, i)
+        if images: text = "\n\n".join([text, *await ocr_images(images, model)]).strip()
+        yield text
+
+async def text_pages(stream, block_size=1 << 16):
+    # Reads .txt files block by block. Pages end at form feeds; a very long page is cut at a paragraph break.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    while True:
+        block = await asyncio.to_thread(stream.read, block_size)
+        try: buffer += decoder.decode(block, final=not block)
+        except UnicodeDecodeError: raise HTTPException(400, "Text files must be UTF-8.")
+        *pages, buffer = buffer.split("\f")
+        for page in pages: yield page
+        if len(buffer) > block_size and (cut := buffer.rfind("\n\n")) > 0:
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+        if not block: break
+    yield buffer
+
+def document_pages(ext, stream, model="ocr"):
+    if ext == "pdf": return pdf_pages(stream, model)
+    if ext == "txt": return text_pages(stream)
+    raise HTTPException(400, "Only .pdf and .txt files supported.")
+
+async def translate_job_chunks(store, job_id, source, target, tone):
+    chunks = store.chunks(job_id)
+    if not chunks: raise HTTPException(400, "No readable text.")
+    results = {c["idx"]: c["result"] for c in chunks}
+    done = sum(r is not None for r in results.values())
+    store.update(job_id, stage="translating", progress=done / len(chunks))
+    sem = asyncio.Semaphore(settings.chunk_concurrency)
+
+    async def one(chunk):
+        nonlocal done
+        results[chunk["idx"]] = out = await translate_chunk(chunk["source"], source, target, tone, sem)
+        store.save_chunk(job_id, chunk["idx"], out)
+        done += 1
+        store.update(job_id, progress=done / len(chunks))
+
+    # Chunks finished before a restart are already in the store and are skipped.
+    await asyncio.gather(*(one(c) for c in chunks if c["result"] is None))
+    return "\n\n".join(results[i] for i in sorted(results))
+
+def save_source(store, job, source):
+    # Auto jobs store the language they were identified as, so a resumed job translates the same way.
+    job["params"]["source_language"] = source
+    store.update(job["id"], params=json.dumps(job["params"]))
+
+async def run_document_job(store, job):
+    p = job["params"]
+    if not store.chunks(job["id"]):
+        store.update(job["id"], stage="extracting")
+        with open(job["input_path"], "rb") as f:
+            pages = [page async for page in document_pages(job["input_path"].rsplit(".", 1)[-1], f, ocr_model(p["source_language"]))]
+        if p["source_language"] == AUTO: save_source(store, job, resolve_source("\n\n".join(pages)[:settings.detect_chars], AUTO)[0])
+        store.set_chunks(job["id"], chunk_pages(pages, settings.chunk_tokens))
+    if p["source_language"] == p["target_language"]: return "\n\n".join(c["source"] for c in store.chunks(job["id"]))
+    return await translate_job_chunks(store, job["id"], p["source_language"], p["target_language"], p["tone"])
+
+@metrics.stage("whisper")
+def transcribe_resumable(store, job_id, path, source=None):
+    # Restarts at the end of the last stored segment instead of from the beginning of the recording.
+    done = store.segments(job_id)
+    offset = done[-1]["end"] if done else 0.0
+    segments, info = models.get("whisper").transcribe(path, clip_timestamps=[offset], language=whisper_language(source))
+    for idx, segment in enumerate(segments, len(done)):
+        store.save_segment(job_id, idx, segment.start, segment.end, segment.text.strip())
+        store.update(job_id, progress=min(segment.end / info.duration, 1.0) if info.duration else 0.0)
+    return " ".join(s["text"] for s in store.segments(job_id) if s["text"]), language_from_code(info.language)
+
+async def run_audio_job(store, job):
+    p = job["params"]
+    if not store.chunks(job["id"]):
+        store.update(job["id"], stage="transcribing")
+        transcript, language = await run_inference(whisper_pool, transcribe_resumable, store, job["id"], job["input_path"], p.get("source_language"), timeout=settings.job_audio_timeout)
+        if p.get("source_language") in (None, AUTO) and language: save_source(store, job, language)
+        if not p.get("target_language"): return transcript
+        if p["source_language"] == AUTO: raise HTTPException(400, "Could not detect the spoken language; please select it.")
+        store.set_chunks(job["id"], chunk_pages([transcript], settings.chunk_tokens))
+    if p["source_language"] == p["target_language"]: return "\n\n".join(c["source"] for c in store.chunks(job["id"]))
+    return await translate_job_chunks(store, job["id"], p["source_language"], p["target_language"], p["tone"])
+
+os.makedirs(settings.jobs_dir, exist_ok=True)
+job_store = JobStore(settings.jobs_db)
+job_runner = JobRunner(job_store, {"document": run_document_job, "audio": run_audio_job}, settings.job_workers, settings.job_retention)
+
+def job_response(job):
+    partial = None
+    if job["status"] != "done":
+        translated = [c["result"] for c in job_store.chunks(job["id"]) if c["result"] is not None]
+        if translated: partial = "\n\n".join(translated)
+        elif job["kind"] == "audio": partial = " ".join(s["text"] for s in job_store.segments(job["id"]) if s["text"]) or None
+    return JobResponse(job_id=job["id"], kind=job["kind"], status=job["status"], stage=job["stage"], progress=job["progress"], result=job["result"], partial_result=partial, error=job["error"],
+                       source_language=job["params"].get("source_language"))
+
+def save_upload(src, path):
+    with open(path, "wb") as dst: shutil.copyfileobj(src, dst)
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_chain(chain, inputs, stage, on_complete=None):
+    # Emits "token" events as the model generates, then one "done" event with the full text and Ollama's usage.
+    parts, usage = [], track_usage()
+    try:
+        with metrics.stage(stage):
+            async for token in chain.astream(inputs):
+                parts.append(token)
+                yield sse("token", {"text": token})
+    except Exception as e:
+        yield sse("error", {"detail": str(e)})
+        return
+    text = "".join(parts).strip()
+    if on_complete: await asyncio.to_thread(on_complete, text)
+    yield sse("done", {"text": text, "usage": usage.stats()})
+
+async def stream_cached(text):
+    yield sse("token", {"text": text})
+    yield sse("done", {"text": text})
+
+# StreamingResponse skips its background task when the client disconnects; this one runs it however the
+# stream ends, including a client that leaves before the first event.
+class EventStreamResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send):
+        background, self.background = self.background, None
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if background is not None: await background()
+
+def event_stream(events, background=None):
+    return EventStreamResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, background=background)
+
+CHAINS = {"translation": translation_chain, "reference": reference_chain, "batch": batch_chain, "auto": auto_chain, "explanation": explanation_chain}
+INFERENCE_POOLS = (ocr_pool, whisper_pool, tts_pool)
+
+def pool_samples(key):
+    return [({"pool": pool.name}, pool.stats()[key]) for pool in INFERENCE_POOLS]
+
+def endpoint_samples(key):
+    return [({"model": model, "url": e["url"]}, e[key]) for model, pool in ollama_pools.items() for e in pool.stats()]
+
+def model_samples(key):
+    return [({"model": name}, status[key]) for name, status in models.status().items()]
+
+# Components keep their own counters (the /…/stats endpoints); /metrics reads them at scrape time.
+for key, kind, text in (
+    ("queue_depth", "gauge", "Inference jobs waiting for a worker."), ("running", "gauge", "Inference jobs running."),
+    ("completed", "counter", "Inference jobs completed."), ("failed", "counter", "Inference jobs that raised."),
+    ("rejected", "counter", "Inference jobs rejected with 429."), ("timed_out", "counter", "Inference jobs answered with 504."),
+):
+    metrics.collected(f"wordweave_inference_{key}" + ("_total" if kind == "counter" else ""), text, lambda key=key: pool_samples(key), kind)
+for key, kind, text in (
+    ("healthy", "gauge", "1 if the Ollama server passed its last health check."), ("in_flight", "gauge", "Requests in flight per Ollama server."),
+    ("requests", "counter", "Requests sent to each Ollama server."), ("failures", "counter", "Connection failures per Ollama server."),
+    ("prompt_tokens", "counter", "Prompt tokens evaluated by Ollama."), ("completion_tokens", "counter", "Tokens generated by Ollama."),
+    ("prompt_seconds", "counter", "Time Ollama spent evaluating prompts."), ("eval_seconds", "counter", "Time Ollama spent generating tokens."),
+    ("load_seconds", "counter", "Time Ollama spent loading models."), ("truncated", "counter", "Generations stopped by num_predict."),
+    ("tokens_per_second", "gauge", "Average generation speed since startup."),
+):
+    metrics.collected(f"wordweave_ollama_{key}" + ("_total" if kind == "counter" else ""), text, lambda key=key: endpoint_samples(key), kind)
+metrics.collected("wordweave_ollama_coalesced_total", "Duplicate requests that shared an in-flight generation.", lambda: [({"chain": name}, chain.coalesced) for name, chain in CHAINS.items()], "counter")
+metrics.collected("wordweave_model_ready", "1 once a local model is loaded.", lambda: [(labels, state == "ready") for labels, state in model_samples("state")])
+metrics.collected("wordweave_model_load_seconds", "Time taken to load each local model.", lambda: model_samples("load_seconds"))
+metrics.collected("wordweave_model_warmup_seconds", "Time taken by each local model's warmup inference.", lambda: model_samples("warmup_seconds"))
+metrics.collected("wordweave_translation_cache_hit_rate", "Share of translation cache lookups that hit.", lambda: [({}, translation_cache.stats()["hit_rate"])])
+metrics.collected("wordweave_translation_cache_lookups_total", "Translation cache lookups by result.", lambda: [({"result": k}, v) for k, v in translation_cache.stats().items() if k in ("memory_hits", "disk_hits", "misses")], "counter")
+metrics.collected("wordweave_translation_cache_entries", "Translation cache entries by tier.", lambda: [({"tier": k.split("_")[0]}, v) for k, v in translation_cache.stats().items() if k.endswith("_entries")])
+metrics.collected("wordweave_translation_memory_lookups_total", "Translation memory lookups by result.", lambda: [({"result": result}, translation_memory.stats()[key]) for result, key in (("exact", "exact_hits"), ("fuzzy", "fuzzy_hits"), ("miss", "misses"))], "counter")
+metrics.collected("wordweave_translation_memory_entries", "Segment pairs in the translation memory.", lambda: [({}, translation_memory.stats()["entries"])])
+metrics.collected("wordweave_tts_cache_hit_rate", "Share of sentence audio cache lookups that hit.", lambda: [({}, tts_engine.cache.stats()["hit_rate"])])
+metrics.collected("wordweave_tts_cache_bytes", "Memory held by cached sentence audio.", lambda: [({}, tts_engine.cache.stats()["bytes"])])
+metrics.collected("wordweave_job_queue_depth", "Background jobs waiting for a worker.", lambda: [({}, job_runner.queue_depth())])
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/languages", response_model=list[LanguageInfo])
+async def languages():
+    # What each language can be used for with the current configuration.
+    # With per-language readers, any language EasyOCR has a pack for can be read when it is named explicitly.
+    return [LanguageInfo(name=lang.name, code=lang.code, ocr=lang.name in settings.ocr_languages or (settings.ocr_per_language and lang.ocr is not None),
+                         speech_to_text=lang.whisper is not None,
+                         text_to_speech=tts_engine.backend.supports(lang.tts)) for lang in LANGUAGES]
+
+@app.get("/health/models")
+async def model_status():
+    return models.status()
+
+@app.get("/ollama/stats")
+async def ollama_stats():
+    return {
+        "endpoints": {model: pool.stats() for model, pool in ollama_pools.items()},
+        "coalesced": {name: chain.coalesced for name, chain in CHAINS.items()},
+    }
+
+@app.get("/inference/stats")
+async def inference_stats():
+    return {pool.name: pool.stats() for pool in INFERENCE_POOLS}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {**translation_cache.stats(), "translation_memory": translation_memory.stats(), "tts": tts_engine.cache.stats()}
 
 @app.post("/translate/", response_model=TranslateResponse)
 async def translate(req: TranslateRequest): 
     return await process_translation_request(req.text, req.source_language, req.target_language, req.tone)
 
+async def with_language(detected, events):
+    # Auto mode: a "language" event with the detected source comes before the translation.
+    if detected: yield sse("language", {"detected_language": detected})
+    async for event in events: yield event
+
+@app.post("/translate/stream")
+async def translate_stream(req: TranslateRequest):
+    validate_langs(req.source_language, req.target_language, req.tone)
+    source, detected = resolve_source(req.text, req.source_language)
+    if source == req.target_language: return event_stream(with_language(detected, stream_cached(req.text)))
+    if estimate_tokens(req.text) > settings.chunk_tokens:
+        # Too long for one generation: translated chunk by chunk, then sent whole.
+        return event_stream(with_language(detected, stream_cached(await translate_text(req.text, source, req.target_language, req.tone))))
+    known, chain, inputs = await plan_translation(req.text, source, req.target_language, req.tone)
+    if known is not None: return event_stream(with_language(detected, stream_cached(known)))
+    remember = lambda out: remember_translations([(req.text, out)], source, req.target_language, req.tone)
+    return event_stream(with_language(detected, stream_chain(chain, inputs, "translate", remember)))
+
+@app.post("/translate/batch", response_model=BatchResponse)
+async def translate_batch(req: BatchRequest):
+    return await process_batch_request(req.items)
+
+@app.get("/tm/export")
+async def tm_export(source_language: LanguageName | None = None, target_language: LanguageName | None = None):
+    entries = await asyncio.to_thread(translation_memory.entries, source_language, target_language)
+    return StreamingResponse(write_tmx(entries, lambda name: LANGUAGES_BY_NAME[name].code), media_type="application/x-tmx+xml",
+                             headers={"Content-Disposition": 'attachment; filename="wordweave.tmx"'})
+
+@app.post("/tm/import", response_model=TMImportResponse)
+async def tm_import(file: UploadFile = File(...)):
+    # Every pair of languages in a translation unit is stored, in both directions.
+    if not file.filename.lower().endswith(".tmx"): raise HTTPException(400, "Only .tmx files supported.")
+    check_upload(file)
+    try: imported = await asyncio.to_thread(translation_memory.add_many, read_tmx(file.file, language_from_code))
+    except ParseError as e: raise HTTPException(400, f"Could not read TMX: {e}")
+    return TMImportResponse(imported=imported)
+
 @app.post("/upload_and_translate_image/", response_model=TranslateResponse)
-async def image_translate(file: UploadFile = File(...), source_language: str = Form(...), target_language: str = Form(...), tone: str = Form(...)):
-    if not file.filename.lower().endswith(('.jpg', '.jpeg', '.png')): raise HTTPException(400, "Only image files supported.")
-    content = await file.read()
-    text = " ".join([res[1] for res in ocr_reader.readtext(content)]).strip()
-    if not text: raise HTTPException(400, "No text detected.")
-    return await process_translation_request(text, source_language, target_language, tone)
+async def image_translate(file: UploadFile = File(...), source_language: SourceLanguage = Form(...), target_language: LanguageName = Form(...), tone: Tone = Form(...)):
+    validate_langs(source_language, target_language, tone)
+    return await process_document_request(ocr_uploads([file], ocr_model(source_language)), source_language, target_language, tone)
+
+@app.post("/upload_and_translate_images/", response_model=TranslateResponse)
+async def images_translate(files: list[UploadFile] = File(...), source_language: SourceLanguage = Form(...), target_language: LanguageName = Form(...), tone: Tone = Form(...)):
+    validate_langs(source_language, target_language, tone)
+    return await process_document_request(ocr_uploads(files, ocr_model(source_language)), source_language, target_language, tone)
 
 @app.post("/upload_and_translate_document/", response_model=TranslateResponse)
-async def doc_translate(file: UploadFile = File(...), source_language: str = Form(...), target_language: str = Form(...), tone: str = Form(...)):
+async def doc_translate(file: UploadFile = File(...), source_language: SourceLanguage = Form(...), target_language: LanguageName = Form(...), tone: Tone = Form(...)):
     ext = file.filename.lower().split('.')[-1]
-    content = await file.read()
-    if ext == "pdf":
-        reader = PyPDF2.PdfReader(io.BytesIO(content))
-        text = "".join([p.extract_text() or "" for p in reader.pages]).strip()
-    elif ext == "txt":
-        text = content.decode("utf-8").strip()
+    check_upload(file)
+    return await process_document_request(document_pages(ext, file.file, ocr_model(source_language)), source_language, target_language, tone)
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(file: UploadFile = File(...), source_language: SourceLanguage | None = Form(None), target_language: LanguageName | None = Form(None), tone: Tone = Form("Neutral")):
+    # Documents (.pdf/.txt) are translated; audio is transcribed, and translated too when target_language is given.
+    ext = file.filename.lower().split('.')[-1]
+    check_upload(file)
+    if ext in ("pdf", "txt"):
+        kind = "document"
+        if not source_language or not target_language: raise HTTPException(400, "source_language and target_language are required for documents.")
+    elif (file.content_type or "").startswith("audio/"):
+        kind = "audio"
+        if target_language and not source_language: raise HTTPException(400, "source_language is required to translate audio.")
     else:
-        raise HTTPException(400, "Only .pdf and .txt files supported.")
-    if not text: raise HTTPException(400, "No readable text.")
-    return await process_translation_request(text, source_language, target_language, tone)
+        raise HTTPException(400, "Only .pdf, .txt and audio files supported.")
+    if target_language: validate_langs(source_language, target_language, tone)
+    path = os.path.join(settings.jobs_dir, f"{uuid.uuid4().hex}.{ext}")
+    await asyncio.to_thread(save_upload, file.file, path)
+    job_id = job_store.create(kind, {"source_language": source_language, "target_language": target_language, "tone": tone}, path)
+    job_runner.submit(job_id)
+    return job_response(job_store.get(job_id))
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None: raise HTTPException(404, "Job not found.")
+    return job_response(job)
+
+def tts_sentences(text, language):
+    code = LANGUAGES_BY_NAME[language].tts
+    if not tts_engine.backend.supports(code): raise HTTPException(400, f"TTS not supported for: {language}")
+    cleaned_text = re.sub(r'\s*\([^)]*\)', '', text).strip()
+    sentences = tts_engine.sentences(cleaned_text)
+    if not sentences: raise HTTPException(400, "Nothing to speak.")
+    return code, sentences
+
+async def synthesize(code, sentences):
+    # Keeps a few sentences synthesizing ahead so playback never waits on the next one.
+    tasks = {}
+    try:
+        for i in range(len(sentences)):
+            for j in range(i, min(i + 1 + settings.tts_lookahead, len(sentences))):
+                if j not in tasks: tasks[j] = asyncio.create_task(run_inference(tts_pool, tts_engine.synthesize_sentence, sentences[j], code))
+            yield await tasks.pop(i)
+    finally:
+        for task in tasks.values(): task.cancel()
+
+async def stream_audio(code, sentences):
+    first = True
+    async for audio in synthesize(code, sentences):
+        yield tts_engine.backend.stream_chunk(audio, first)
+        first = False
 
 @app.post("/text_to_speech/", response_model=TTSResponse)
 async def tts(req: TTSRequest):
-    code = LANG_MAP.get(req.language)
-    if not code: raise HTTPException(400, f"TTS not supported for: {req.language}")
+    code, sentences = tts_sentences(req.text, req.language)
+    chunks = [audio async for audio in synthesize(code, sentences)]
+    return TTSResponse(audio_base64=base64.b64encode(tts_engine.backend.concat(chunks)).decode())
 
-    cleaned_text = re.sub(r'\s*\([^)]*\)', '', req.text).strip()
-
-    fp = io.BytesIO()
-    gTTS(cleaned_text, lang=code).write_to_fp(fp)
-    fp.seek(0)
-    return TTSResponse(audio_base64=base64.b64encode(fp.read()).decode())
+@app.post("/text_to_speech/stream")
+async def tts_stream(req: TTSRequest):
+    code, sentences = tts_sentences(req.text, req.language)
+    return StreamingResponse(stream_audio(code, sentences), media_type=tts_engine.backend.media_type)
 
 @app.post("/speech_to_text/", response_model=STTResponse)
-async def stt(audio_file: UploadFile = File(...)):
+async def stt(audio_file: UploadFile = File(...), language: LanguageName | None = Form(None)):
+    # Without `language`, Whisper identifies the spoken language and it is returned as detected_language.
     if not audio_file or not getattr(audio_file, "content_type", "").startswith("audio/"):
         raise HTTPException(400, "Audio files only.")
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tf:
-        tf.write(await audio_file.read())
-        temp_path = tf.name
-    
+    check_upload(audio_file)
+    # Whisper decodes straight from the spooled upload; no extra copy in memory and no temp file of our own.
+    text, detected = await run_inference(whisper_pool, transcribe, audio_file.file, language)
+    return STTResponse(transcribed_text=text, detected_language=detected if language is None else None)
+
+@metrics.stage("whisper")
+def transcribe_segments(audio, source, push):
+    # Hands the language, then each segment, to `push` as soon as Whisper has decoded it.
+    segments, info = models.get("whisper").transcribe(audio, language=whisper_language(source))
+    push(("language", source if source in SUPPORTED_LANGUAGES else language_from_code(info.language)))
+    for segment in segments: push(("text", segment.text.strip()))
+
+async def voice_sentence(text, source, target, tone, code, sem, tts_sem):
+    translated = text if source == target else await translate_chunk(text, source, target, tone, sem)
+    # Cached or untranslated sentences are ready at once; like ocr_images, keep this request to the TTS
+    # workers so a long recording cannot fill the queue for everyone else.
+    async with tts_sem: return translated, await run_inference(tts_pool, tts_engine.synthesize_sentence, translated, code)
+
+async def voice_translation(path, source, target, tone, code):
+    # Whisper, translation and TTS overlap: each sentence is translated and synthesized as soon as Whisper
+    # has finished it, while later ones are still being transcribed. Results are sent in spoken order.
+    loop = asyncio.get_running_loop()
+    segments, ordered, tasks = asyncio.Queue(), asyncio.Queue(), []
+    sem, tts_sem = asyncio.Semaphore(settings.chunk_concurrency), asyncio.Semaphore(settings.tts_workers)
+    usage = track_usage()
+
+    async def transcribe_all():
+        try: await run_inference(whisper_pool, transcribe_segments, path, source, lambda item: loop.call_soon_threadsafe(segments.put_nowait, item))
+        finally: segments.put_nowait(None)
+
+    async def produce():
+        language, buffer = source, ""
+        def start(sentences):
+            for text in sentences:
+                tasks.append(asyncio.create_task(voice_sentence(text, language, target, tone, code, sem, tts_sem)))
+                ordered.put_nowait(("sentence", text, tasks[-1]))
+        whisper = asyncio.create_task(transcribe_all())
+        try:
+            while (item := await segments.get()) is not None:
+                kind, value = item
+                if kind == "language":
+                    if value is None: raise HTTPException(400, "Could not detect the spoken language; please select it.")
+                    language = value
+                    if source == AUTO: ordered.put_nowait(("language", value))
+                elif value:
+                    done, buffer = finished_sentences(f"{buffer} {value}", settings.voice_max_sentence_chars)
+                    start(done)
+            await whisper  # raises what Whisper raised (429, 504, undecodable audio)
+            start(finished_sentences(buffer, 0)[0])
+        except Exception as e:
+            ordered.put_nowait(("error", str(getattr(e, "detail", e))))
+        finally:
+            whisper.cancel()
+            ordered.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    transcript, translation = [], []
     try:
-        segments, _ = whisper_model.transcribe(temp_path)
-        transcribed_text = " ".join(segment.text for segment in segments).strip()
-        return STTResponse(transcribed_text=transcribed_text)
+        while (item := await ordered.get()) is not None:
+            if item[0] == "language":
+                yield sse("language", {"detected_language": item[1]})
+                continue
+            if item[0] == "error":
+                yield sse("error", {"detail": item[1]})
+                return
+            _, text, task = item
+            try: translated, audio = await task
+            except Exception as e:
+                yield sse("error", {"detail": str(getattr(e, "detail", e))})
+                return
+            transcript.append(text)
+            translation.append(translated)
+            yield sse("sentence", {"index": len(transcript) - 1, "text": text, "translation": translated,
+                                   "audio_base64": base64.b64encode(audio).decode(), "media_type": tts_engine.backend.media_type})
+        yield sse("done", {"transcript": " ".join(transcript), "translation": " ".join(translation), "usage": usage.stats()})
     finally:
-        os.unlink(temp_path)
+        producer.cancel()
+        for task in tasks: task.cancel()
+
+@app.post("/voice_translate")
+async def voice_translate(audio_file: UploadFile = File(...), source_language: SourceLanguage = Form(AUTO), target_language: LanguageName = Form(...), tone: Tone = Form("Neutral")):
+    # Speech in, speech out, as Server-Sent Events: one "sentence" event per spoken sentence with its
+    # transcript, translation and audio (base64), then "done". In Auto mode a "language" event comes first.
+    if not (audio_file.content_type or "").startswith("audio/"): raise HTTPException(400, "Audio files only.")
+    validate_langs(source_language, target_language, tone)
+    code = LANGUAGES_BY_NAME[target_language].tts
+    if not tts_engine.backend.supports(code): raise HTTPException(400, f"TTS not supported for: {target_language}")
+    check_upload(audio_file)
+    # The upload is closed once this handler returns, so the stream works from a copy, removed when the response ends.
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(audio_file.filename or "")[1])
+    os.close(fd)
+    await asyncio.to_thread(save_upload, audio_file.file, path)
+    return event_stream(voice_translation(path, source_language, target_language, tone, code), BackgroundTask(remove_input, path))
+
+@app.websocket("/ws/speech_to_text")
+async def stt_stream(ws: WebSocket):
+    # Protocol: the client sends 16 kHz mono PCM16 frames as binary messages and the text message "end"
+    # when it stops recording. Each utterance is sent back as {"type": "partial"} once VAD sees a pause,
+    # followed by one {"type": "final"} message with the whole transcript.
+    await ws.accept()
+    segmenter = UtteranceSegmenter(detect_speech, settings.stream_min_silence, settings.stream_max_utterance)
+    parts = []
+
+    async def emit(utterances):
+        for start, audio in utterances:
+            text, _ = await run_inference(whisper_pool, transcribe, audio)
+            if not text: continue
+            parts.append(text)
+            await ws.send_json({"type": "partial", "text": text, "start": round(start, 2), "end": round(start + len(audio) / SAMPLE_RATE, 2)})
+
+    try:
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect": return
+            if message.get("bytes"):
+                await emit(await asyncio.to_thread(segmenter.feed, message["bytes"]))
+            elif message.get("text") == "end":
+                await emit(await asyncio.to_thread(segmenter.flush))
+                await ws.send_json({"type": "final", "text": " ".join(parts)})
+                await ws.close()
+                return
+    except HTTPException as e:
+        await ws.send_json({"type": "error", "detail": e.detail})
+        await ws.close(1011)
+    except WebSocketDisconnect:
+        pass
+
+def explain_inputs(req):
+    validate_langs(req.source_language, req.target_language)
+    inputs = {"text_to_explain": req.text, "source_language": req.source_language, "target_language": req.target_language}
+    # An explanation covers the whole text in one call, so text that leaves no room for the answer is refused.
+    if not explanation_chain.fits(inputs): raise HTTPException(413, "Text too long to explain at once; select a shorter passage.")
+    return inputs
 
 @app.post("/explain_translation/", response_model=ExplainResponse)
 async def explain(req: ExplainRequest):
-    validate_langs(req.source_language, req.target_language)
-    out = await explanation_chain.ainvoke({
-        "text_to_explain": req.text,
-        "source_language": req.source_language,
-        "target_language": req.target_language
-    })
-    return ExplainResponse(explanation=out.strip())
+    inputs = explain_inputs(req)
+    usage = track_usage()
+    with metrics.stage("explain"):
+        out = await explanation_chain.ainvoke(inputs)
+    return ExplainResponse(explanation=out.strip(), usage=usage.stats())
+
+@app.post("/explain_translation/stream")
+async def explain_stream(req: ExplainRequest):
+    return event_stream(stream_chain(explanation_chain, explain_inputs(req), "explain"))
@@ -0,0 +1,44 @@
+import math
+from dataclasses import dataclass
+
+# Rough per-language figures for sizing Ollama calls: tokens per character for Gemma's tokenizer, and
+# characters needed relative to English for the same content. Languages not listed behave like English.
+#                       tokens/char  chars vs English
+LANGUAGE_DENSITY = {
+    "Russian": (0.30, 1.0), "Ukrainian": (0.30, 1.0), "Belarusian": (0.30, 1.0), "Bulgarian": (0.30, 1.0), "Serbian": (0.30, 1.0),
+    "Greek": (0.35, 1.1), "Arabic": (0.30, 0.8), "Persian": (0.30, 0.8), "Urdu": (0.30, 0.8), "Hebrew": (0.30, 0.8),
+    "Hindi": (0.40, 1.0), "Bengali": (0.40, 1.0), "Punjabi": (0.40, 1.0), "Assamese": (0.40, 1.0),
+    "Thai": (0.35, 0.9), "Burmese": (0.60, 1.1), "Japanese": (0.80, 0.4), "Korean": (0.60, 0.45),
+    "Simplified Chinese": (0.80, 0.3), "Traditional Chinese": (0.80, 0.3), "Cantonese": (0.80, 0.3),
+}
+ENGLISH_DENSITY = (0.25, 1.0)
+
+def density(language):
+    return LANGUAGE_DENSITY.get(language, ENGLISH_DENSITY)
+
+def text_tokens(text, language=None):
+    return math.ceil(len(text) * density(language)[0])
+
+def translation_tokens(text, source, target):
+    # Expected length of the translation of `text`, in tokens of the target language.
+    (_, source_chars), (target_tokens, target_chars) = density(source), density(target)
+    return math.ceil(len(text) / source_chars * target_chars * target_tokens)
+
+class ContextOverflow(ValueError): pass
+
+# Per-call Ollama options for one chain. num_ctx is a fixed setting shared by every chain of a model, since
+# Ollama reloads a model whenever num_ctx changes. num_predict is sized from the expected output with
+# headroom, so a runaway generation stops early while a long translation is never cut short.
+@dataclass(frozen=True)
+class GenerationProfile:
+    num_ctx: int = 8192
+    headroom: float = 2.0
+    min_predict: int = 128
+    max_predict: int | None = None    # cap for open-ended outputs such as explanations
+
+    def options(self, prompt_tokens, expected_tokens=None):
+        room = self.num_ctx - prompt_tokens
+        if room < self.min_predict: raise ContextOverflow(f"Prompt of ~{prompt_tokens} tokens does not fit the {self.num_ctx}-token context.")
+        predict = room if expected_tokens is None else max(self.min_predict, math.ceil(expected_tokens * self.headroom))
+        if self.max_predict: predict = min(predict, self.max_predict)
+        return {"num_ctx": self.num_ctx, "num_predict": min(predict, room)}
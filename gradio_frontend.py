@@ -1,46 +1,80 @@
 import gradio as gr
-import requests
+import httpx
+from httpx_sse import aconnect_sse
 import asyncio
-import functools
 import base64
+import json
+import mimetypes
 import os
 import tempfile, threading, time
+import numpy as np
+import websockets
+from languages import AUTO, LANGUAGE_NAMES, SUPPORTED_LANGUAGES, SUPPORTED_TONES, TONE_OPTIONS
+
+FASTAPI_URL = os.environ.get("WORDWEAVE_API_URL", "http://127.0.0.1:8000")
+WS_URL = FASTAPI_URL.replace("http", "ws", 1)
+UI_CONCURRENCY = int(os.environ.get("WORDWEAVE_UI_CONCURRENCY", "64"))  # events handled at once per handler; they only wait on the backend
+UI_QUEUE = int(os.environ.get("WORDWEAVE_UI_QUEUE", "1024"))            # events allowed to wait before Gradio turns users away
+UI_CONNECTIONS = int(os.environ.get("WORDWEAVE_UI_CONNECTIONS", "100"))  # connections to the backend shared by all sessions
+PERSIST_HISTORY = os.environ.get("WORDWEAVE_PERSIST_HISTORY", "").lower() in ("1", "true", "yes")  # keep history in the browser
+HISTORY_SIZE = 3
+
+live_sessions = {}  # Gradio session hash -> open /ws/speech_to_text connection and partial transcripts
+LIVE_IDLE_SECONDS = 30.0  # a socket that gets no audio for this long is closed, e.g. after its tab was closed mid-recording
+SOURCE_LANGUAGES = [AUTO, *LANGUAGE_NAMES]  # "Auto" lets the backend identify the language of the input; opt-in until detection of short text is reliable
+
+# Reads may take as long as a whole document translation; everything else fails fast.
+HTTP_TIMEOUT = httpx.Timeout(10.0, read=600.0)
+_client = None
+
+def http_client():
+    # One client for every session, created on Gradio's event loop: connections to the backend are kept
+    # alive and reused across clicks instead of each request opening its own.
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(base_url=FASTAPI_URL, timeout=HTTP_TIMEOUT,
+                                    limits=httpx.Limits(max_connections=UI_CONNECTIONS, max_keepalive_connections=UI_CONNECTIONS, keepalive_expiry=30.0))
+    return _client
 
-FASTAPI_URL = "http://127.0.0.1:8000"
-
-LANGUAGE_NAMES = sorted([
-    "English", "French", "Punjabi", "Spanish", "German", "Hindi", "Bengali", "Arabic",
-    "Japanese", "Korean", "Russian", "Portuguese", "Italian", "Dutch",
-    "Swedish", "Polish", "Turkish", "Vietnamese", "Thai", "Indonesian",
-    "Malay", "Urdu", "Persian", "Ukrainian", "Hebrew", "Greek", "Czech",
-    "Danish", "Finnish", "Norwegian", "Romanian", "Hungarian", "Bulgarian",
-    "Slovak", "Slovenian", "Lithuanian", "Latvian", "Estonian", "Croatian",
-    "Serbian", "Bosnian", "Albanian", "Assamese", "Azerbaijani",
-    "Belarusian", "Burmese", "Catalan", "Cebuano", "Simplified Chinese",
-    "Traditional Chinese", "Cantonese", "Zulu"
-])
-
-TONE_OPTIONS = ["Neutral", "Formal", "Informal", "Friendly", "Sarcastic", "Angry", "Relaxed", "Enthusiastic"]
+async def async_post(endpoint, json=None, files=None, data=None):
+    response = await http_client().post(endpoint, json=json, files=files, data=data)
+    response.raise_for_status()
+    return response.json()
 
-translation_history = []
-favourites = []
+async def async_upload(endpoint, field, path, data=None, content_type=None):
+    # httpx reads the open file in chunks while sending, so the upload is never held in memory.
+    filename = os.path.basename(path)
+    with open(path, "rb") as f:
+        file = (filename, f, content_type) if content_type else (filename, f)
+        return await async_post(endpoint, files={field: file}, data=data)
 
-async def async_post(endpoint, json=None, files=None, data=None):
-    loop = asyncio.get_running_loop()
-    fn = functools.partial(requests.post, FASTAPI_URL + endpoint, json=json, files=files, data=data)
-    response = await loop.run_in_executor(None, fn)
+async def async_get(endpoint):
+    response = await http_client().get(endpoint)
     response.raise_for_status()
     return response.json()
 
-async def translate_text(text, source_lang, target_lang, tone):
+async def async_stream(endpoint, json=None, files=None, data=None):
+    # Yields (event, data) pairs from a Server-Sent Events endpoint as they arrive.
+    async with aconnect_sse(http_client(), "POST", endpoint, json=json, files=files, data=data) as source:
+        if source.response.is_error:
+            await source.response.aread()
+            source.response.raise_for_status()
+        async for event in source.aiter_sse():
+            yield event.event, event.json()
+
+async def translate_text(text, source_lang, target_lang, tone, history):
     if not text.strip():
-        return "Error: Please enter text to translate."
+        yield "Error: Please enter text to translate.", history
+        return
     if source_lang == target_lang:
-        return "Error: Source and target languages cannot be the same."
-    if source_lang not in LANGUAGE_NAMES or target_lang not in LANGUAGE_NAMES:
-        return "Error: Invalid language selected."
-    if tone not in TONE_OPTIONS:
-        return f"Error: Invalid tone. Choose from {TONE_OPTIONS}"
+        yield "Error: Source and target languages cannot be the same.", history
+        return
+    if source_lang not in SOURCE_LANGUAGES or target_lang not in SUPPORTED_LANGUAGES:
+        yield "Error: Invalid language selected.", history
+        return
+    if tone not in SUPPORTED_TONES:
+        yield f"Error: Invalid tone. Choose from {TONE_OPTIONS}", history
+        return
 
     try:
         payload = {
@@ -49,15 +83,24 @@ async def translate_text(text, source_lang, target_lang, tone):
             "target_language": target_lang,
             "tone": tone
         }
-        result = await async_post("/translate/", json=payload)
-        translated = result.get("translated_text", "")
-        _add_to_history(text, source_lang, target_lang, tone, translated)
-        return translated
-    except requests.exceptions.RequestException as e:
-        return f"API error: {str(e)}"
-
-def _add_to_history(input_text, src, tgt, tone, translation):
-    global translation_history
+        translated = ""
+        async for event, data in async_stream("/translate/stream", payload):
+            if event == "language":
+                source_lang = data["detected_language"]
+            elif event == "token":
+                translated += data["text"]
+                yield translated, history
+            elif event == "done":
+                translated = data["text"]
+                yield translated, _add_to_history(history, text, source_lang, target_lang, tone, translated)
+            elif event == "error":
+                yield f"API error: {data['detail']}", history
+    except httpx.HTTPError as e:
+        yield f"API error: {str(e)}", history
+
+# History and favourites are per session (gr.State, or gr.BrowserState with WORDWEAVE_PERSIST_HISTORY).
+# Handlers return new lists rather than changing the ones they are given.
+def _add_to_history(history, input_text, src, tgt, tone, translation):
     entry = {
         "input": input_text,
         "source": src,
@@ -65,121 +108,216 @@ def _add_to_history(input_text, src, tgt, tone, translation):
         "tone": tone,
         "translation": translation
     }
-    translation_history.insert(0, entry)
-    if len(translation_history) > 3:
-        translation_history.pop()
-
-def save_to_favourites():
-    if not translation_history:
-        return "No translations to save."
-    latest = translation_history[0]  
+    return [entry, *history][:HISTORY_SIZE]
+
+def save_to_favourites(history, favourites):
+    if not history:
+        return "No translations to save.", favourites
+    latest = history[0]
     if latest in favourites:
-        return "Already in favourites."
-    favourites.append(latest)
-    return "Saved to favourites."
+        return "Already in favourites.", favourites
+    return "Saved to favourites.", [*favourites, latest]
 
-def get_history_text():
-    if not translation_history:
-        return "No history yet."
+def format_entries(entries):
     out = ""
-    for i, entry in enumerate(translation_history, 1):
+    for i, entry in enumerate(entries, 1):
         out += f"#{i}: [{entry['source']} → {entry['target']} | Tone: {entry['tone']}]\n"
         out += f"Input: {entry['input']}\nTranslated: {entry['translation']}\n\n"
     return out.strip()
 
-def get_favourites_text():
-    if not favourites:
-        return "No favourites saved."
-    out = ""
-    for i, entry in enumerate(favourites, 1):
-        out += f"#{i}: [{entry['source']} → {entry['target']} | Tone: {entry['tone']}]\n"
-        out += f"Input: {entry['input']}\nTranslated: {entry['translation']}\n\n"
-    return out.strip()
+def format_history(history):
+    return format_entries(history) if history else "No history yet."
 
-def format_history():
-    if not translation_history:
-        return "No history yet."
-    out = ""
-    for i, entry in enumerate(translation_history, 1):
-        out += f"#{i}: [{entry['source']} → {entry['target']} | Tone: {entry['tone']}]\n"
-        out += f"Input: {entry['input']}\nTranslated: {entry['translation']}\n\n"
-    return out.strip()
+def get_favourites_text(favourites):
+    return format_entries(favourites) if favourites else "No favourites saved."
 
-async def translate_image(file, source_lang, target_lang, tone):
+async def translate_image(file, source_lang, target_lang, tone, history):
     if file is None:
-        return "Error: Please upload an image file."
+        return "Error: Please upload an image file.", history
     if source_lang == target_lang:
-        return "Error: Source and target languages cannot be the same."
-    if source_lang not in LANGUAGE_NAMES or target_lang not in LANGUAGE_NAMES:
-        return "Error: Invalid language selected."
-    if tone not in TONE_OPTIONS:
-        return f"Error: Invalid tone. Choose from {TONE_OPTIONS}"
+        return "Error: Source and target languages cannot be the same.", history
+    if source_lang not in SOURCE_LANGUAGES or target_lang not in SUPPORTED_LANGUAGES:
+        return "Error: Invalid language selected.", history
+    if tone not in SUPPORTED_TONES:
+        return f"Error: Invalid tone. Choose from {TONE_OPTIONS}", history
 
     try:
         filename = os.path.basename(file)
-        with open(file, "rb") as f:
-            file_bytes = f.read()
-        files = {"file": (filename, file_bytes)}
         data = {
             "source_language": source_lang,
             "target_language": target_lang,
             "tone": tone
         }
-        result = await async_post("/upload_and_translate_image/", files=files, data=data)
+        result = await async_upload("/upload_and_translate_image/", "file", file, data=data)
         translated = result.get("translated_text", "")
-        _add_to_history(f"[Image OCR: {filename}]", source_lang, target_lang, tone, translated)
-        return translated
-    except requests.exceptions.RequestException as e:
-        return f"API error: {str(e)}"
+        source_lang = result.get("detected_language") or source_lang
+        return translated, _add_to_history(history, f"[Image OCR: {filename}]", source_lang, target_lang, tone, translated)
+    except httpx.HTTPError as e:
+        return f"API error: {str(e)}", history
 
-async def translate_document(file, source_lang, target_lang, tone):
+async def translate_document(file, source_lang, target_lang, tone, history):
     if file is None:
-        return "Error: Please upload a document file (.pdf or .txt)."
+        return "Error: Please upload a document file (.pdf or .txt).", history
     if source_lang == target_lang:
-        return "Error: Source and target languages cannot be the same."
-    if source_lang not in LANGUAGE_NAMES or target_lang not in LANGUAGE_NAMES:
-        return "Error: Invalid language selected."
-    if tone not in TONE_OPTIONS:
-        return f"Error: Invalid tone. Choose from {TONE_OPTIONS}"
+        return "Error: Source and target languages cannot be the same.", history
+    if source_lang not in SOURCE_LANGUAGES or target_lang not in SUPPORTED_LANGUAGES:
+        return "Error: Invalid language selected.", history
+    if tone not in SUPPORTED_TONES:
+        return f"Error: Invalid tone. Choose from {TONE_OPTIONS}", history
 
     ext = file.name.lower().split('.')[-1]
     if ext not in ["pdf", "txt"]:
-        return "Error: Only .pdf and .txt documents are supported."
+        return "Error: Only .pdf and .txt documents are supported.", history
 
     try:
         filename = os.path.basename(file)
-        with open(file, "rb") as f:
-            file_bytes = f.read()
-        files = {"file": (filename, file_bytes)}
         data = {
             "source_language": source_lang,
             "target_language": target_lang,
             "tone": tone
         }
-        result = await async_post("/upload_and_translate_document/", files=files, data=data)
+        result = await async_upload("/upload_and_translate_document/", "file", file, data=data)
         translated = result.get("translated_text", "")
-        _add_to_history(f"[Document OCR: {filename}]", source_lang, target_lang, tone, translated)
-        return translated
-    except requests.exceptions.RequestException as e:
-        return f"API error: {str(e)}"
+        source_lang = result.get("detected_language") or source_lang
+        return translated, _add_to_history(history, f"[Document OCR: {filename}]", source_lang, target_lang, tone, translated)
+    except httpx.HTTPError as e:
+        return f"API error: {str(e)}", history
+
+async def translate_document_job(file, source_lang, target_lang, tone, history):
+    # Long documents run as a background job on the backend; poll it and show progress and partial output.
+    if file is None:
+        yield "Error: Please upload a document file (.pdf or .txt).", history
+        return
+    if source_lang == target_lang:
+        yield "Error: Source and target languages cannot be the same.", history
+        return
+    ext = file.name.lower().split('.')[-1]
+    if ext not in ["pdf", "txt"]:
+        yield "Error: Only .pdf and .txt documents can run in the background.", history
+        return
+
+    try:
+        filename = os.path.basename(file)
+        data = {
+            "source_language": source_lang,
+            "target_language": target_lang,
+            "tone": tone
+        }
+        job = await async_upload("/jobs", "file", file, data=data)
+        while job["status"] in ("queued", "running"):
+            yield f"[{job['stage'] or 'queued'}: {job['progress']:.0%}]\n\n{job['partial_result'] or ''}".strip(), history
+            await asyncio.sleep(1)
+            job = await async_get(f"/jobs/{job['job_id']}")
+        if job["status"] == "failed":
+            yield f"Job failed: {job['error']}", history
+            return
+        yield job["result"], _add_to_history(history, f"[Document OCR: {filename}]", job["source_language"] or source_lang, target_lang, tone, job["result"])
+    except httpx.HTTPError as e:
+        yield f"API error: {str(e)}", history
+
+async def voice_translate(audio_file, source_lang, target_lang, tone, history):
+    # One request for speech -> translation -> speech; each sentence's audio plays as soon as the backend has it,
+    # while later sentences are still being transcribed and translated.
+    if audio_file is None or not os.path.exists(audio_file):
+        yield "Error: Please record or upload audio.", "", None, history
+        return
+    if source_lang == target_lang:
+        yield "Error: Source and target languages cannot be the same.", "", None, history
+        return
+    if source_lang not in SOURCE_LANGUAGES or target_lang not in SUPPORTED_LANGUAGES:
+        yield "Error: Invalid language selected.", "", None, history
+        return
 
-async def speech_to_text(audio_file):
-    if (audio_file is None or 
-        not os.path.exists(audio_file) or 
-        os.path.getsize(audio_file) < 100):
-        return "Error: Please upload an audio file."
+    transcript, translation = [], []
     try:
-        filename = os.path.basename(audio_file)
         with open(audio_file, "rb") as f:
-            audio_bytes = f.read()
+            files = {"audio_file": (os.path.basename(audio_file), f, mimetypes.guess_type(audio_file)[0] or "audio/wav")}
+            form = {"source_language": source_lang, "target_language": target_lang, "tone": tone}
+            async for event, data in async_stream("/voice_translate", files=files, data=form):
+                if event == "language":
+                    source_lang = data["detected_language"]
+                elif event == "sentence":
+                    transcript.append(data["text"])
+                    translation.append(data["translation"])
+                    yield " ".join(transcript), " ".join(translation), base64.b64decode(data["audio_base64"]), history
+                elif event == "done":
+                    history = _add_to_history(history, f"[Voice] {data['transcript']}", source_lang, target_lang, tone, data["translation"])
+                    yield data["transcript"], data["translation"], None, history
+                elif event == "error":
+                    yield " ".join(transcript), f"API error: {data['detail']}", None, history
+    except httpx.HTTPError as e:
+        yield " ".join(transcript), f"API error: {str(e)}", None, history
+
+def to_pcm16(sample_rate, data):
+    # The backend expects 16 kHz mono PCM16; browsers usually record 44.1/48 kHz.
+    audio = data.astype(np.float32)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if data.dtype == np.int16:
+        audio /= 32768.0
+    if sample_rate != 16000:
+        n = int(len(audio) * 16000 / sample_rate)
+        audio = np.interp(np.linspace(0, len(audio), n, endpoint=False), np.arange(len(audio)), audio)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+async def close_live_session(session_hash):
+    session = live_sessions.pop(session_hash, None)
+    if session:
+        await session["ws"].close()
+
+async def close_idle_live_sessions():
+    now = time.monotonic()
+    for session_hash in [h for h, s in live_sessions.items() if now - s["used"] > LIVE_IDLE_SECONDS]:
+        await close_live_session(session_hash)
+
+async def end_live_session(request: gr.Request):
+    await close_live_session(request.session_hash)
+
+async def live_transcribe(chunk, request: gr.Request):
+    if chunk is None:
+        return gr.skip()
+    await close_idle_live_sessions()
+    try:
+        session = live_sessions.get(request.session_hash)
+        if session is None:
+            ws = await websockets.connect(WS_URL + "/ws/speech_to_text")
+            session = live_sessions[request.session_hash] = {"ws": ws, "parts": []}
+        session["used"] = time.monotonic()
+        await session["ws"].send(to_pcm16(*chunk))
+        # Pick up whatever utterances have finished without waiting for more.
+        while True:
+            try:
+                message = json.loads(await asyncio.wait_for(session["ws"].recv(), 0.01))
+            except asyncio.TimeoutError:
+                break
+            if message["type"] == "partial":
+                session["parts"].append(message["text"])
+            elif message["type"] == "error":
+                raise RuntimeError(message["detail"])
+        return " ".join(session["parts"])
+    except (OSError, RuntimeError, websockets.exceptions.WebSocketException) as e:
+        await close_live_session(request.session_hash)
+        return f"API error: {str(e)}"
 
-        files = {"audio_file": (filename, audio_bytes, "audio/wav")}  # you can change MIME if needed
-        
-        result = await async_post("/speech_to_text/", files=files)
-        return result.get("transcribed_text", "")
-    except requests.exceptions.RequestException as e:
+async def finish_live_transcription(request: gr.Request):
+    session = live_sessions.pop(request.session_hash, None)
+    if session is None:
+        return gr.skip()
+    ws = session["ws"]
+    try:
+        await ws.send("end")
+        async for raw in ws:
+            message = json.loads(raw)
+            if message["type"] == "final":
+                return message["text"]
+            if message["type"] == "error":
+                return f"API error: {message['detail']}"
+        return " ".join(session["parts"])
+    except websockets.exceptions.WebSocketException as e:
         return f"API error: {str(e)}"
-    
+    finally:
+        await ws.close()
+
 def delete_file_later(path, delay=15):
     def _delete():
         time.sleep(delay)
@@ -194,51 +332,55 @@ def delete_file_later(path, delay=15):
 async def text_to_speech(translated_text, tts_language):
     if not translated_text.strip():
         return "Error: Please enter text for TTS."
-    if tts_language not in LANGUAGE_NAMES:
+    if tts_language not in SUPPORTED_LANGUAGES:
         return "Error: Invalid language selected."
 
     try:
-        payload = {
-            "text": translated_text,
-            "language": tts_language
-        }
-        result = await async_post("/text_to_speech/", json=payload)
-
-        if not translated_text:
-            return "Translation failed before TTS."
-
         payload = {"text": translated_text, "language": tts_language}
-        result = await async_post("/text_to_speech/", json=payload)
-        audio_base64 = result.get("audio_base64", "")
-        if not audio_base64:
-            return "TTS failed: no audio returned."
-
-        audio_bytes = base64.b64decode(audio_base64)
-
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_audio:
-            tmp_audio.write(audio_bytes)
-            temp_path = tmp_audio.name
+        # Audio arrives as a binary stream, sentence by sentence; write it straight to the temp file.
+        async with http_client().stream("POST", "/text_to_speech/stream", json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            suffix = ".wav" if "wav" in response.headers.get("content-type", "") else ".mp3"
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_audio:
+                async for chunk in response.aiter_bytes():
+                    tmp_audio.write(chunk)
+                temp_path = tmp_audio.name
 
         delete_file_later(temp_path, delay=15)
         return temp_path
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return f"API error: {str(e)}"
 
-async def explain_translation(text, source_lang, target_lang):
+async def explain_translation(text, source_lang, target_lang, history):
     if not text.strip():
-        return "Nothing to explain."
+        yield "Nothing to explain."
+        return
+    if source_lang == AUTO:
+        # The text explained is the translation, so the source is whatever the latest translation was detected as.
+        if not history or history[0]["source"] == AUTO:
+            yield "Error: Please select the source language."
+            return
+        source_lang = history[0]["source"]
     try:
         payload = {
             "text": text,
             "source_language": source_lang,
             "target_language": target_lang
         }
-        result = await async_post("/explain_translation/", json=payload)
-        return result.get("explanation", "")
-    except requests.exceptions.RequestException as e:
-        return f"API error: {str(e)}"
+        explanation = ""
+        async for event, data in async_stream("/explain_translation/stream", payload):
+            if event == "token":
+                explanation += data["text"]
+            elif event == "done":
+                explanation = data["text"]
+            elif event == "error":
+                explanation = f"API error: {data['detail']}"
+            yield explanation
+    except httpx.HTTPError as e:
+        yield f"API error: {str(e)}"
 
 theme = gr.themes.Citrus(
     primary_hue="blue",
@@ -293,18 +435,25 @@ with gr.Blocks(title="Ollama Multilingual Translator", analytics_enabled=False,
             # Hidden state variables for changing labels
             show_history_state = gr.State(False)    
             show_favourites_state = gr.State(False)
+            # Each browser session gets its own history and favourites.
+            if PERSIST_HISTORY:
+                history_state = gr.BrowserState([], storage_key="wordweave_history")
+                favourites_state = gr.BrowserState([], storage_key="wordweave_favourites")
+            else:
+                history_state = gr.State([])
+                favourites_state = gr.State([])
 
         # Main UI column
         with gr.Column(scale=4): 
             with gr.Tab("Text Translation") as text_tab:
                 with gr.Row():
-                    source_lang = gr.Dropdown(choices=LANGUAGE_NAMES, value="English", label="Source Language")
+                    source_lang = gr.Dropdown(choices=SOURCE_LANGUAGES, value="English", label="Source Language")
                     target_lang = gr.Dropdown(choices=LANGUAGE_NAMES, value="French", label="Target Language")
 
                 with gr.Row():
                     text_input = gr.Textbox(lines=5, label="Input Text", placeholder="Enter text to translate...", show_copy_button=True)
                     with gr.Column(scale=1):
-                        mic_audio = gr.Audio(sources=["microphone"], type="filepath", label="Record your voice")
+                        mic_audio = gr.Audio(sources=["microphone"], type="numpy", streaming=True, label="Record your voice")
                         translate_btn = gr.Button("Translate")
 
                 with gr.Row():
@@ -322,22 +471,38 @@ with gr.Blocks(title="Ollama Multilingual Translator", analytics_enabled=False,
 
             with gr.Tab("Image/Document Translation") as ocr_tab:
                 with gr.Row():
-                    ocr_source_lang = gr.Dropdown(choices=LANGUAGE_NAMES, value="English", label="Source Language")
+                    ocr_source_lang = gr.Dropdown(choices=SOURCE_LANGUAGES, value="English", label="Source Language")
                     ocr_target_lang = gr.Dropdown(choices=LANGUAGE_NAMES, value="French", label="Target Language")
-                file_input = gr.File(label="Upload Image (.jpg, .jpeg, .png) or Document (.pdf, .txt)", file_types=[".jpg", ".jpeg", ".png", ".pdf", ".txt"])
+                file_input = gr.File(label="Upload Image (.jpg, .jpeg, .png, .tiff, .bmp, .webp) or Document (.pdf, .txt)", file_types=[".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp", ".pdf", ".txt"])
         
                 ocr_tone = gr.Dropdown(choices=TONE_OPTIONS, value="Neutral", label="Tone")
                 with gr.Row():
                     ocr_translate_btn = gr.Button("Translate Uploaded File")
+                    ocr_job_btn = gr.Button("Translate in Background")
                     ocr_explain_btn = gr.Button("Explain the Translation")
                 with gr.Row():
                     ocr_text_output = gr.Textbox(lines=5, label="Translated Text", interactive=False)
                     ocr_explanation_output = gr.Textbox(lines=5, label="Explanation", interactive=False, elem_classes="scrollbox")
 
+            with gr.Tab("Voice Translation") as voice_tab:
+                with gr.Row():
+                    voice_source_lang = gr.Dropdown(choices=SOURCE_LANGUAGES, value="English", label="Spoken Language")
+                    voice_target_lang = gr.Dropdown(choices=LANGUAGE_NAMES, value="French", label="Target Language")
+                    voice_tone = gr.Dropdown(choices=TONE_OPTIONS, value="Neutral", label="Tone")
+                voice_input = gr.Audio(sources=["microphone", "upload"], type="filepath", label="Speak or upload audio")
+                voice_btn = gr.Button("Translate Speech")
+                with gr.Row():
+                    voice_transcript = gr.Textbox(lines=4, label="Transcript", interactive=False)
+                    voice_translation = gr.Textbox(lines=4, label="Translation", interactive=False, show_copy_button=True)
+                voice_audio_output = gr.Audio(label="Translated Speech", streaming=True, autoplay=True)
+
             # Define callbacks
-            translate_btn.click(translate_text, inputs=[text_input, source_lang, target_lang, tone], outputs=[text_output])
+            translate_btn.click(translate_text, inputs=[text_input, source_lang, target_lang, tone, history_state], outputs=[text_output, history_state])
 
-            mic_audio.change(speech_to_text, inputs=mic_audio, outputs=text_input)
+            mic_audio.stream(live_transcribe, inputs=mic_audio, outputs=text_input, stream_every=0.5)
+            mic_audio.stop_recording(finish_live_transcription, outputs=text_input)
+            # A tab closed mid-recording never fires stop_recording.
+            demo.unload(end_live_session)
 
             tts_btn.click(
             text_to_speech,
@@ -345,61 +510,67 @@ with gr.Blocks(title="Ollama Multilingual Translator", analytics_enabled=False,
             outputs=tts_audio_output
             )
 
-            explain_btn.click(explain_translation, inputs=[text_output, source_lang, target_lang], outputs=explanation_output)
+            explain_btn.click(explain_translation, inputs=[text_output, source_lang, target_lang, history_state], outputs=explanation_output)
+
+            voice_btn.click(voice_translate, inputs=[voice_input, voice_source_lang, voice_target_lang, voice_tone, history_state],
+                            outputs=[voice_transcript, voice_translation, voice_audio_output, history_state])
 
-            history_btn.click(get_history_text, outputs=[history_output])
-            favourites_btn.click(get_favourites_text, outputs=[favourites_output])
-            save_fav_btn.click(save_to_favourites, outputs=[favourites_output])
+            history_btn.click(format_history, inputs=[history_state], outputs=[history_output])
+            favourites_btn.click(get_favourites_text, inputs=[favourites_state], outputs=[favourites_output])
+            save_fav_btn.click(save_to_favourites, inputs=[history_state, favourites_state], outputs=[favourites_output, favourites_state])
 
-            async def route_ocr_translation(file, src, tgt, tone):
+            async def route_ocr_translation(file, src, tgt, tone, history):
                 if file is None:
-                    return "Please upload a file."
+                    return "Please upload a file.", history
                 ext = file.name.lower().split('.')[-1]
-                if ext in ["jpg", "jpeg", "png"]:
-                    return await translate_image(file, src, tgt, tone)
+                if ext in ["jpg", "jpeg", "png", "tif", "tiff", "bmp", "webp"]:
+                    return await translate_image(file, src, tgt, tone, history)
                 elif ext in ["pdf", "txt"]:
-                    return await translate_document(file, src, tgt, tone)
+                    return await translate_document(file, src, tgt, tone, history)
                 else:
-                    return "Unsupported file type."
+                    return "Unsupported file type.", history
 
 
-            ocr_translate_btn.click(route_ocr_translation, inputs=[file_input, ocr_source_lang, ocr_target_lang, ocr_tone], outputs=[ocr_text_output])
-            ocr_explain_btn.click(explain_translation, inputs=[ocr_text_output, ocr_source_lang, ocr_target_lang], outputs=ocr_explanation_output)
+            ocr_translate_btn.click(route_ocr_translation, inputs=[file_input, ocr_source_lang, ocr_target_lang, ocr_tone, history_state], outputs=[ocr_text_output, history_state])
+            ocr_job_btn.click(translate_document_job, inputs=[file_input, ocr_source_lang, ocr_target_lang, ocr_tone, history_state], outputs=[ocr_text_output, history_state])
+            ocr_explain_btn.click(explain_translation, inputs=[ocr_text_output, ocr_source_lang, ocr_target_lang, history_state], outputs=ocr_explanation_output)
 
             # Track visibility states
             show_history_state = gr.State(False)
             show_favourites_state = gr.State(False)
             
-            def toggle_history_combined(show):
+            def toggle_history_combined(show, history):
                 new_state = not show
                 return (
                     gr.update(visible=new_state),    # Show/hide the container
                     gr.update(value="Hide History" if new_state else "Show History"),      # Change button label
-                    format_history() if new_state else "",                 # Set new textbox content
+                    format_history(history) if new_state else "",                 # Set new textbox content
                     new_state                        # Update state
                 )
 
-            def toggle_favourites_combined(show):
+            def toggle_favourites_combined(show, favourites):
                 new_state = not show
                 return (
                     gr.update(visible=new_state),
                     gr.update(value="Hide Favourites" if new_state else "Show Favourites"),
-                    get_favourites_text() if new_state else "",
+                    get_favourites_text(favourites) if new_state else "",
                     new_state
                 )
 
             favourites_btn.click(
                 toggle_favourites_combined,
-                inputs=[show_favourites_state],
+                inputs=[show_favourites_state, favourites_state],
                 outputs=[favourites_col, favourites_btn, favourites_output, show_favourites_state]
             )
 
             history_btn.click(
                 toggle_history_combined,
-                inputs=[show_history_state],
+                inputs=[show_history_state, history_state],
                 outputs=[history_col, history_btn, history_output, show_history_state]
             )
 
-            history_btn.click(lambda: format_history(), outputs=history_output)
+            history_btn.click(format_history, inputs=history_state, outputs=history_output)
 
-demo.launch()
+# Handlers only wait on the backend, so many can run at once; the backend's own pools and 429s bound the real work.
+demo.queue(default_concurrency_limit=UI_CONCURRENCY, max_size=UI_QUEUE)
+demo.launch(max_threads=UI_CONCURRENCY)
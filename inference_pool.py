@@ -0,0 +1,63 @@
+import asyncio, contextvars, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+class PoolBusy(Exception): pass
+
+# A bounded worker pool per model so CPU/GPU-heavy inference never runs on the event loop.
+# Jobs beyond `workers` wait in a queue of at most `max_queue`; anything more is rejected.
+class InferencePool:
+    def __init__(self, name, workers=1, max_queue=8, timeout=120.0):
+        self.name, self.workers, self.max_queue, self.timeout = name, workers, max_queue, timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self.queued = self.running = 0
+        self.completed = self.failed = self.rejected = self.timed_out = 0
+        self.wait_seconds = self.run_seconds = 0.0
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise PoolBusy(f"{self.name} queue is full ({self.max_queue} waiting)")
+            self.queued += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_seconds += started - submitted
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.run_seconds += time.perf_counter() - started
+
+        # The copied context carries the caller's request trace into the worker thread.
+        future = self._executor.submit(contextvars.copy_context().run, job)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout or self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # A job that has not started yet is dropped; one already running finishes in the background.
+            if future.cancel():
+                with self._lock: self.queued -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                with self._lock: self.timed_out += 1
+            raise
+        except Exception:
+            with self._lock: self.failed += 1
+            raise
+        with self._lock: self.completed += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers, "queue_depth": self.queued, "running": self.running, "max_queue": self.max_queue,
+                "completed": self.completed, "failed": self.failed, "rejected": self.rejected, "timed_out": self.timed_out,
+                "avg_wait_seconds": self.wait_seconds / finished if finished else 0.0,
+                "avg_run_seconds": self.run_seconds / finished if finished else 0.0,
+            }
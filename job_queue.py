@@ -0,0 +1,134 @@
+import asyncio, json, os, sqlite3, threading, time, uuid, logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, stage TEXT, progress REAL NOT NULL DEFAULT 0,
+    params TEXT NOT NULL, input_path TEXT, result TEXT, error TEXT, created REAL NOT NULL, updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_chunks (
+    job_id TEXT NOT NULL, idx INTEGER NOT NULL, source TEXT NOT NULL, result TEXT, PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS job_segments (
+    job_id TEXT NOT NULL, idx INTEGER NOT NULL, start REAL NOT NULL, end REAL NOT NULL, text TEXT NOT NULL, PRIMARY KEY (job_id, idx)
+);
+"""
+
+# Job state, checkpoints and results on local disk so a restarted worker resumes where it stopped.
+# Documents checkpoint per translated chunk, audio per transcribed segment.
+class JobStore:
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    def _write(self, sql, args=()):
+        with self._lock:
+            self._db.execute(sql, args)
+            self._db.commit()
+
+    def _read(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def create(self, kind, params, input_path):
+        job_id, now = uuid.uuid4().hex, time.time()
+        self._write("INSERT INTO jobs (id, kind, status, params, input_path, created, updated) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                    (job_id, kind, json.dumps(params), input_path, now, now))
+        return job_id
+
+    def get(self, job_id):
+        rows = self._read("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if not rows: return None
+        job = dict(rows[0])
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        self._write(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?", (*fields.values(), job_id))
+
+    def purge(self, before):
+        # Deletes jobs that finished before `before`, with their checkpoints; returns their input paths.
+        with self._lock:
+            rows = self._db.execute("SELECT id, input_path FROM jobs WHERE status IN ('done', 'failed') AND updated < ?", (before,)).fetchall()
+            ids = [(r["id"],) for r in rows]
+            for table, column in (("job_chunks", "job_id"), ("job_segments", "job_id"), ("jobs", "id")):
+                self._db.executemany(f"DELETE FROM {table} WHERE {column} = ?", ids)
+            self._db.commit()
+        return [r["input_path"] for r in rows if r["input_path"]]
+
+    def unfinished(self):
+        return [r["id"] for r in self._read("SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created")]
+
+    def chunks(self, job_id):
+        return self._read("SELECT idx, source, result FROM job_chunks WHERE job_id = ? ORDER BY idx", (job_id,))
+
+    def set_chunks(self, job_id, sources):
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO job_chunks (job_id, idx, source) VALUES (?, ?, ?)", [(job_id, i, s) for i, s in enumerate(sources)])
+            self._db.commit()
+
+    def save_chunk(self, job_id, idx, result):
+        self._write("UPDATE job_chunks SET result = ? WHERE job_id = ? AND idx = ?", (result, job_id, idx))
+
+    def segments(self, job_id):
+        return self._read("SELECT idx, start, end, text FROM job_segments WHERE job_id = ? ORDER BY idx", (job_id,))
+
+    def save_segment(self, job_id, idx, start, end, text):
+        self._write("INSERT OR REPLACE INTO job_segments (job_id, idx, start, end, text) VALUES (?, ?, ?, ?, ?)", (job_id, idx, start, end, text))
+
+def remove_input(path):
+    try: os.remove(path)
+    except FileNotFoundError: pass
+
+# Runs jobs on a fixed number of asyncio workers. `handlers` maps a job kind to an async function
+# (store, job) -> result text; handlers report progress and checkpoints through the store.
+# A job's input file is removed once it is done or has failed, and the job itself `retention` seconds later.
+class JobRunner:
+    def __init__(self, store, handlers, workers=2, retention=7 * 86400, purge_interval=3600.0):
+        self.store, self.handlers, self.workers = store, handlers, workers
+        self.retention, self.purge_interval = retention, purge_interval
+        self._queue = asyncio.Queue()
+        self._tasks = []
+
+    def start(self):
+        for job_id in self.store.unfinished(): self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+
+    async def _purge_loop(self):
+        while True:
+            for path in await asyncio.to_thread(self.store.purge, time.time() - self.retention): remove_input(path)
+            await asyncio.sleep(self.purge_interval)
+
+    async def stop(self):
+        for task in self._tasks: task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def submit(self, job_id):
+        self._queue.put_nowait(job_id)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self.store.get(job_id)
+            if job is None or job["status"] not in ("queued", "running"): continue
+            self.store.update(job_id, status="running")
+            try:
+                result = await self.handlers[job["kind"]](self.store, job)
+                self.store.update(job_id, status="done", stage="done", progress=1.0, result=result)
+            except asyncio.CancelledError:
+                # Shutting down: leave the job "running" so the next start picks it up from its checkpoints.
+                raise
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                self.store.update(job_id, status="failed", error=str(getattr(e, "detail", e)))
+            if job["input_path"]: remove_input(job["input_path"])
@@ -0,0 +1,112 @@
+import re
+from bisect import bisect_right
+from collections import Counter
+
+# Local language identification: the Unicode script settles most languages outright; languages sharing
+# a script (Latin, Cyrillic, Arabic, Han) are told apart by marker letters and small lists of frequent words.
+# Runs in well under a millisecond on a paragraph, so it can sit in front of every LLM call.
+
+_RANGES = sorted([
+    (0x0041, 0x024F, "Latin"), (0x1E00, 0x1EFF, "Latin"), (0x0370, 0x03FF, "Greek"), (0x0400, 0x052F, "Cyrillic"),
+    (0x0590, 0x05FF, "Hebrew"), (0x0600, 0x06FF, "Arabic"), (0x0750, 0x077F, "Arabic"), (0xFB50, 0xFDFF, "Arabic"), (0xFE70, 0xFEFF, "Arabic"),
+    (0x0900, 0x097F, "Devanagari"), (0x0980, 0x09FF, "Bengali"), (0x0A00, 0x0A7F, "Gurmukhi"), (0x0E00, 0x0E7F, "Thai"), (0x1000, 0x109F, "Myanmar"),
+    (0x1100, 0x11FF, "Hangul"), (0x3130, 0x318F, "Hangul"), (0xAC00, 0xD7AF, "Hangul"), (0x3040, 0x30FF, "Kana"),
+    (0x3400, 0x4DBF, "Han"), (0x4E00, 0x9FFF, "Han"), (0xF900, 0xFAFF, "Han"),
+])
+_STARTS = [start for start, _, _ in _RANGES]
+
+# Scripts used by exactly one supported language.
+SCRIPT_LANGUAGES = {"Greek": "Greek", "Hebrew": "Hebrew", "Devanagari": "Hindi", "Gurmukhi": "Punjabi", "Thai": "Thai", "Myanmar": "Burmese", "Hangul": "Korean"}
+
+# language -> (frequent words, marker letters)
+_LATIN = {
+    "English": ("the and is are was of to in that it you for with this have not be on at by from what hello thanks please my your we they will where want go home good morning there about would can do how who which when our all just like know been were", ""),
+    "French": ("le la les et est un une des du de que qui dans pour pas sur avec ce il elle nous vous je bonjour merci au aux mais très être où veux aller bien matin suis avez voudrais peux fait comment quoi", "œêèàùâîôûç"),
+    "Spanish": ("el la los las y es un una que de del en por para con no se lo su como pero más hola gracias está muy yo eres qué dónde quiero buenos días buenas tengo puedo hacer cómo también estoy", "ñ¿¡"),
+    "German": ("der die das und ist nicht ein eine ich sie es zu mit den dem auf für von sind auch wir hallo danke bitte wie was sehr haben wo will gehen guten morgen tag heute geht dir mir kann möchte", "ßäöü"),
+    "Portuguese": ("o a os as e é um uma que de do da em no na para com não por se mais olá obrigado obrigada você muito está são mas onde quero bom dia boa tenho posso fazer como também estou", "ãõç"),
+    "Italian": ("il lo la gli le e è un una che di del della in per con non sono ciao grazie questo come ma molto anche io sei dove voglio buongiorno buona sera ho posso fare anche sto", "àèìòù"),
+    "Dutch": ("de het een en is van dat niet ik je op te met voor zijn er maar ook hallo dank bedankt wat hoe we wij goed waar wil gaan goedemorgen morgen kan heb hebben", ""),
+    "Swedish": ("och är att det som en ett i på jag du inte med för av till den har hej tack vad hur vi mycket också god morgon var vill kan", "åäö"),
+    "Danish": ("og er at det som en et i på jeg du ikke med for af til den har hej tak hvad hvordan vi meget også", "æøå"),
+    "Norwegian": ("og er at det som en et i på jeg du ikke med for av til den har hei takk hva hvordan vi mye også", "æøå"),
+    "Polish": ("i w nie to jest się na z że do jak co ale tak dla czy są dzień dobry dziękuję cześć bardzo jestem też", "ąęłńśźżć"),
+    "Czech": ("a je to v se na že s z do jak co ale tak pro jsem jsou není ahoj děkuji dobrý den velmi také", "řůě"),
+    "Slovak": ("a je to v sa na že s z do ako čo ale tak pre som sú nie ahoj ďakujem dobrý deň veľmi tiež", "ľĺŕôä"),
+    "Slovenian": ("in je da v se na z za ki ne so to kako kaj ali tudi sem zelo hvala dober dan živjo pa", "čšž"),
+    "Croatian": ("i je da u se na za ne su to kako što ali ili sam jako hvala dobar dan bok od koji biti", "čćšžđ"),
+    "Bosnian": ("i je da u se na za ne su to kako šta ali ili sam jako hvala dobar dan zdravo od koji", "čćšžđ"),
+    "Serbian": ("i je da u se na za ne su to kako šta ali ili sam veoma hvala dobar dan zdravo od koji biti", "čćšžđ"),
+    "Romanian": ("și este în un o că de la pe cu nu se din pentru care mai sunt bună mulțumesc foarte ce dar", "șțăâîşţ"),
+    "Hungarian": ("a az és hogy nem egy van is meg de ez azt csak már szia köszönöm jó nagyon vagy mint volt", "őű"),
+    "Finnish": ("ja on ei se että hän oli olen ovat mutta kuin myös minä sinä kiitos hyvää moi hei mitä tämä ole niin", "äö"),
+    "Estonian": ("ja on ei see et ta oli olen aga kui ka mina sina aitäh tere hea mis kas väga need", "õäöü"),
+    "Lithuanian": ("ir yra ne tai kad į su iš bet kaip ar aš tu ačiū labas labai buvo jis ji mes", "ėįųū"),
+    "Latvian": ("un ir nav tas ka ar uz no bet kā es tu paldies labdien sveiki ļoti bija viņš mēs arī", "āēīūķļņģ"),
+    "Turkish": ("ve bir bu da de için ile ne çok ben sen o değil var yok merhaba teşekkürler teşekkür ederim nasıl gibi daha ama", "ğış"),
+    "Azerbaijani": ("və bir bu da də üçün ilə nə çox mən sən o deyil var yox salam təşəkkür edirəm necə kimi daha amma", "ə"),
+    "Vietnamese": ("và là của có không một những các được cho này tôi bạn xin chào cảm ơn rất với người trong đã", "ơưđạảấầẩậắằặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ"),
+    "Indonesian": ("dan yang di ini itu dengan untuk tidak ada dari saya anda kamu terima kasih selamat apa akan juga bisa sudah adalah karena saja sangat halo pikir", ""),
+    "Malay": ("dan yang di ini itu dengan untuk tidak ada dari saya anda awak terima kasih selamat apa akan juga boleh sudah ialah kerana sahaja sangat helo fikir", ""),
+    "Albanian": ("dhe është një në të për me nuk që së nga si unë ti faleminderit përshëndetje mirë shumë ka janë", "ëç"),
+    "Catalan": ("el la els les i és un una que de del en per amb no es com però més hola gràcies molt està jo ets són aquest", "·çàèòï"),
+    "Cebuano": ("ang sa ug nga mga si ni kay dili ako ikaw siya kami salamat maayong buntag unsa kini kana naa wala", ""),
+    "Zulu": ("ukuthi futhi kodwa ngoba uma ngi sawubona ngiyabonga yebo cha unjani kakhulu lokhu kusho abantu umuntu izwe ngiyaphila", ""),
+}
+_CYRILLIC = {
+    "Russian": ("и в не на я что он с как это по но они мы вы привет спасибо да нет очень был есть для", "ыэёъ"),
+    "Ukrainian": ("і в не на я що він з як це по але вони ми ви привіт дякую так ні дуже був є для", "іїєґ"),
+    "Belarusian": ("і у не на я што ён з як гэта па але яны мы вы прывітанне дзякуй так вельмі", "ўіыэ"),
+    "Bulgarian": ("и в не на аз че той с как това по но те ние вие здравей благодаря да много беше е за", "ъщ"),
+    "Serbian": ("и у не на ја да он са како то по али они ми ви здраво хвала је су веома", "ђћџљњј"),
+}
+
+def _profile(profiles):
+    # Single letters ("i", "a", "y") and words listed for more than one language match text in all of them,
+    # so only words that point to one language are kept.
+    counts = Counter(w for words, _ in profiles.values() for w in set(words.split()))
+    return {name: (frozenset(w for w in words.split() if len(w) > 1 and counts[w] == 1), markers) for name, (words, markers) in profiles.items()}
+
+_PROFILES = {"Latin": _profile(_LATIN), "Cyrillic": _profile(_CYRILLIC)}
+# A shared-script language is only reported with this much evidence (a word counts 1, a marker letter 0.25)
+# and this lead over the runner-up; short greetings and UI labels are left undecided.
+MIN_SCORE, MIN_MARGIN = 2.0, 1.0
+
+CANTONESE = frozenset("嘅係咗唔佢啲嘢喺冇嚟咁")
+TRADITIONAL = frozenset("這個們說來時會對為國還學過樣麼與開關愛聽見長門問間經點體頭無車東書話請謝貓氣電語讓實現從進")
+SIMPLIFIED = frozenset("这个们说来时会对为国还学过样么与开关爱听见长门问间经点体头无车东书话请谢猫气电语让实现从进")
+WORD = re.compile(r"[^\W\d_]+")
+
+def script_of(ch):
+    i = bisect_right(_STARTS, ord(ch)) - 1
+    return _RANGES[i][2] if i >= 0 and ord(ch) <= _RANGES[i][1] else None
+
+def script_counts(text):
+    return Counter(script for script in map(script_of, text) if script)
+
+def _by_words(text, profiles):
+    words = WORD.findall(text.lower())
+    scores = {name: sum(w in stopwords for w in words) + 0.25 * sum(text.count(m) for m in markers) for name, (stopwords, markers) in profiles.items()}
+    best, runner_up = sorted(scores.values(), reverse=True)[:2]
+    if best < MIN_SCORE or best - runner_up < MIN_MARGIN: return None
+    return max(scores, key=scores.get)
+
+def detect(text, max_chars=2000):
+    # Returns a language name from the registry, or None when the text doesn't settle it.
+    text = text[:max_chars]
+    counts = script_counts(text)
+    if sum(counts.values()) < 2: return None
+    if counts["Kana"] and counts["Kana"] >= 0.05 * (counts["Kana"] + counts["Han"]): return "Japanese"
+    script = max(counts, key=counts.get)
+    if script in SCRIPT_LANGUAGES: return SCRIPT_LANGUAGES[script]
+    if script == "Bengali": return "Assamese" if ("ৰ" in text or "ৱ" in text) else "Bengali"
+    if script == "Han":
+        if any(ch in CANTONESE for ch in text): return "Cantonese"
+        traditional, simplified = sum(ch in TRADITIONAL for ch in text), sum(ch in SIMPLIFIED for ch in text)
+        return "Traditional Chinese" if traditional > simplified else "Simplified Chinese"
+    if script == "Arabic":
+        if any(ch in "ٹڈڑںے" for ch in text): return "Urdu"
+        if any(ch in "پچژگکی" for ch in text): return "Persian"
+        return "Arabic"
+    if script in _PROFILES: return _by_words(text, _PROFILES[script])
+    return None
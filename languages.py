@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from typing import Literal
+
+@dataclass(frozen=True)
+class Language:
+    name: str                  # what the API and the UI use
+    code: str                  # ISO 639-1 (BCP 47 for the Chinese scripts), used in TMX files
+    tts: str                   # code handed to the TTS backends (gTTS style, e.g. "iw" for Hebrew)
+    ocr: str | None = None     # EasyOCR language pack, None if EasyOCR can't read it
+    whisper: str | None = None # Whisper language code, None if Whisper can't transcribe it
+
+LANGUAGES = (
+    Language("English", "en", "en", "en", "en"),
+    Language("French", "fr", "fr", "fr", "fr"),
+    Language("Punjabi", "pa", "pa", None, "pa"),
+    Language("Spanish", "es", "es", "es", "es"),
+    Language("Persian", "fa", "fa", "fa", "fa"),
+    Language("German", "de", "de", "de", "de"),
+    Language("Hindi", "hi", "hi", "hi", "hi"),
+    Language("Bengali", "bn", "bn", "bn", "bn"),
+    Language("Arabic", "ar", "ar", "ar", "ar"),
+    Language("Japanese", "ja", "ja", "ja", "ja"),
+    Language("Korean", "ko", "ko", "ko", "ko"),
+    Language("Russian", "ru", "ru", "ru", "ru"),
+    Language("Portuguese", "pt", "pt", "pt", "pt"),
+    Language("Italian", "it", "it", "it", "it"),
+    Language("Dutch", "nl", "nl", "nl", "nl"),
+    Language("Swedish", "sv", "sv", "sv", "sv"),
+    Language("Polish", "pl", "pl", "pl", "pl"),
+    Language("Turkish", "tr", "tr", "tr", "tr"),
+    Language("Vietnamese", "vi", "vi", "vi", "vi"),
+    Language("Thai", "th", "th", "th", "th"),
+    Language("Indonesian", "id", "id", "id", "id"),
+    Language("Malay", "ms", "ms", "ms", "ms"),
+    Language("Urdu", "ur", "ur", "ur", "ur"),
+    Language("Ukrainian", "uk", "uk", "uk", "uk"),
+    Language("Hebrew", "he", "iw", None, "he"),
+    Language("Greek", "el", "el", None, "el"),
+    Language("Czech", "cs", "cs", "cs", "cs"),
+    Language("Danish", "da", "da", "da", "da"),
+    Language("Finnish", "fi", "fi", None, "fi"),
+    Language("Norwegian", "no", "no", "no", "no"),
+    Language("Romanian", "ro", "ro", "ro", "ro"),
+    Language("Hungarian", "hu", "hu", "hu", "hu"),
+    Language("Bulgarian", "bg", "bg", "bg", "bg"),
+    Language("Slovak", "sk", "sk", "sk", "sk"),
+    Language("Slovenian", "sl", "sl", "sl", "sl"),
+    Language("Lithuanian", "lt", "lt", "lt", "lt"),
+    Language("Latvian", "lv", "lv", "lv", "lv"),
+    Language("Estonian", "et", "et", "et", "et"),
+    Language("Croatian", "hr", "hr", "hr", "hr"),
+    Language("Serbian", "sr", "sr", "rs_cyrillic", "sr"),
+    Language("Bosnian", "bs", "bs", "bs", "bs"),
+    Language("Albanian", "sq", "sq", "sq", "sq"),
+    Language("Assamese", "as", "as", "as", "as"),
+    Language("Azerbaijani", "az", "az", "az", "az"),
+    Language("Belarusian", "be", "be", "be", "be"),
+    Language("Burmese", "my", "my", None, "my"),
+    Language("Catalan", "ca", "ca", None, "ca"),
+    Language("Cebuano", "ceb", "ceb"),
+    Language("Simplified Chinese", "zh-CN", "zh-CN", "ch_sim", "zh"),
+    Language("Traditional Chinese", "zh-TW", "zh-TW", "ch_tra", "zh"),
+    Language("Cantonese", "yue", "yue", "ch_tra", "yue"),
+    Language("Zulu", "zu", "zu"),
+)
+TONE_OPTIONS = ("Neutral", "Formal", "Informal", "Friendly", "Sarcastic", "Angry", "Relaxed", "Enthusiastic")
+
+LANGUAGES_BY_NAME = {lang.name: lang for lang in LANGUAGES}
+LANGUAGE_NAMES = sorted(LANGUAGES_BY_NAME)
+SUPPORTED_LANGUAGES = frozenset(LANGUAGES_BY_NAME)
+SUPPORTED_TONES = frozenset(TONE_OPTIONS)
+OCR_LANGUAGES = frozenset(lang.name for lang in LANGUAGES if lang.ocr)
+WHISPER_LANGUAGES = frozenset(lang.name for lang in LANGUAGES if lang.whisper)
+
+# Request fields typed with these are checked by pydantic-core against a set of literals.
+LanguageName = Literal[tuple(LANGUAGE_NAMES)]
+# Source fields also accept "Auto": the language is then identified from the text (or by Whisper for audio).
+AUTO = "Auto"
+SourceLanguage = Literal[(AUTO, *LANGUAGE_NAMES)]
+Tone = Literal[TONE_OPTIONS]
+
+# ISO, TTS and Whisper codes all resolve; the first language listed wins (so "zh" is Simplified Chinese).
+_BY_CODE = {}
+for lang in LANGUAGES:
+    for code in (lang.code, lang.tts, lang.whisper):
+        if code: _BY_CODE.setdefault(code.lower(), lang)
+
+def from_code(code):
+    # Codes may carry a region ("fr-FR"); fall back to the primary language subtag.
+    code = (code or "").lower().replace("_", "-")
+    return _BY_CODE.get(code) or _BY_CODE.get(code.split("-")[0])
+
+def ocr_codes(names):
+    unsupported = [name for name in names if name not in OCR_LANGUAGES]
+    if unsupported: raise ValueError(f"EasyOCR cannot read: {', '.join(unsupported)}")
+    return [LANGUAGES_BY_NAME[name].ocr for name in names]
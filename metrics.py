@@ -0,0 +1,152 @@
+import contextvars, json, logging, threading, time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("wordweave.trace")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format(name, labels, value):
+    if labels: name += "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+    return f"{name} {float(value)!r}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(str(labels[n]) for n in self.labels)
+        with self._lock: self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, dict(zip(self.labels, key)), value) for key, value in self._values.items()]
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, tuple(labels), tuple(buckets)
+        self._values = {}  # label values -> [per-bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[n]) for n in self.labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = dict(zip(self.labels, key))
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    out.append((f"{self.name}_bucket", {**labels, "le": f"{bound:g}"}, cumulative))
+                out.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, count))
+                out.append((f"{self.name}_sum", labels, total))
+                out.append((f"{self.name}_count", labels, count))
+        return out
+
+# A gauge or counter read from a component's own stats at scrape time, e.g. queue depths and cache hit rates.
+# `fn` returns a list of (labels dict, value).
+class Collected:
+    def __init__(self, name, help, fn, kind="gauge"):
+        self.name, self.help, self.fn, self.kind = name, help, fn, kind
+
+    def samples(self):
+        return [(self.name, labels, value) for labels, value in self.fn() if value is not None]
+
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._metrics = []
+        self.requests = self.counter("wordweave_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+        self.request_seconds = self.histogram("wordweave_http_request_seconds", "HTTP request latency, including streamed bodies.", ("route", "method"), buckets)
+        self.stage_seconds = self.histogram("wordweave_stage_seconds", "Time spent in each pipeline stage.", ("stage",), buckets)
+        self.stage_errors = self.counter("wordweave_stage_errors_total", "Pipeline stages that raised.", ("stage",))
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collected(self, name, help, fn, kind="gauge"):
+        return self.register(Collected(name, help, fn, kind))
+
+    @contextmanager
+    def stage(self, name):
+        # Works in async code and in worker threads; the span lands in the current request's trace, if any.
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.stage_errors.inc(stage=name)
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            self.stage_seconds.observe(seconds, stage=name)
+            trace = _trace.get()
+            if trace is not None: trace["spans"].append({"stage": name, "start_ms": round((started - trace["started"]) * 1000, 2), "ms": round(seconds * 1000, 2)})
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                logger.exception("Collecting metric %s failed", metric.name)
+                continue
+            lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}"]
+            lines += [_format(name, labels, value) for name, labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+# Pure ASGI rather than @app.middleware("http") so that streamed responses are timed until their last byte
+# and stages running inside the stream still see the request's trace.
+class MetricsMiddleware:
+    def __init__(self, app, metrics, trace=False):
+        self.app, self.metrics, self.trace = app, metrics, trace
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http": return await self.app(scope, receive, send)
+        status = 500
+        started = time.perf_counter()
+        token = _trace.set({"started": started, "spans": []}) if self.trace else None
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start": status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            seconds = time.perf_counter() - started
+            route = scope.get("route")
+            # Route templates, not raw paths, so /jobs/{job_id} stays one series.
+            path = route.path if route is not None else "unmatched"
+            self.metrics.requests.inc(route=path, method=scope["method"], status=status)
+            self.metrics.request_seconds.observe(seconds, route=path, method=scope["method"])
+            if token is not None:
+                trace_logger.info(json.dumps({"route": path, "method": scope["method"], "status": status, "ms": round(seconds * 1000, 2), "spans": _trace.get()["spans"]}))
+                _trace.reset(token)
@@ -0,0 +1,91 @@
+import asyncio, threading, time, logging
+
+logger = logging.getLogger(__name__)
+
+class ModelEntry:
+    def __init__(self, name, loader, warmup=None, evictable=False):
+        self.name, self.loader, self.warmup, self.evictable = name, loader, warmup, evictable
+        self.model = None
+        self.used = 0.0
+        self.state = "unloaded"  # unloaded -> loading -> ready | failed
+        self.error = None
+        self.load_seconds = self.warmup_seconds = None
+        self.lock = threading.Lock()
+
+# Loads each model the first time it is needed (or from a background startup task) instead of at import.
+# At most max_evictable of the models registered as evictable stay loaded; the least recently used goes first.
+class ModelRegistry:
+    def __init__(self, warmup=True, max_evictable=None):
+        self.warmup, self.max_evictable = warmup, max_evictable
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, warmup=None, evictable=False):
+        # Per-language OCR readers are registered while other threads may be evicting.
+        with self._lock: self._entries[name] = ModelEntry(name, loader, warmup, evictable)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def get(self, name):
+        entry = self._entries[name]
+        entry.used = time.monotonic()
+        # Read once: an evicted entry drops its model, but callers already holding it keep using it.
+        if (model := entry.model) is not None: return model
+        with entry.lock:
+            if (model := entry.model) is not None: return model
+            entry.state, entry.error = "loading", None
+            try:
+                started = time.perf_counter()
+                model = entry.loader()
+                entry.load_seconds = time.perf_counter() - started
+                if self.warmup and entry.warmup:
+                    started = time.perf_counter()
+                    entry.warmup(model)
+                    entry.warmup_seconds = time.perf_counter() - started
+            except Exception as e:
+                # Stay retryable: the next request tries to load again.
+                entry.state, entry.error = "failed", str(e)
+                raise
+            entry.model, entry.state = model, "ready"
+            logger.info("Loaded model %s in %.1fs", name, entry.load_seconds)
+        if entry.evictable: self._evict(entry)
+        return model
+
+    def _evict(self, keep):
+        if self.max_evictable is None: return
+        with self._lock:
+            loaded = sorted((e for e in self._entries.values() if e.evictable and e.model is not None and e is not keep), key=lambda e: e.used)
+            for entry in loaded[:max(0, len(loaded) + 1 - self.max_evictable)]:
+                entry.model, entry.state = None, "unloaded"
+                logger.info("Unloaded model %s", entry.name)
+
+    def ready(self, name):
+        return self._entries[name].state == "ready"
+
+    async def preload(self, names):
+        async def load(name):
+            try: await asyncio.to_thread(self.get, name)
+            except Exception: logger.exception("Preloading model %s failed", name)
+        await asyncio.gather(*(load(name) for name in names))
+
+    def status(self):
+        with self._lock: entries = list(self._entries.values())
+        return {e.name: {"state": e.state, "load_seconds": e.load_seconds, "warmup_seconds": e.warmup_seconds, "error": e.error} for e in entries}
+
+def cuda_available():
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+def ctranslate2_cuda_available():
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except ImportError:
+        return False
+
+def resolve_device(device, probe):
+    return ("cuda" if probe() else "cpu") if device == "auto" else device
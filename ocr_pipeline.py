@@ -0,0 +1,47 @@
+import io
+import numpy as np
+from PIL import Image, ImageOps, ImageSequence
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp', '.webp')
+
+def open_images(stream):
+    # Multi-page TIFFs come back as one image per page.
+    image = Image.open(stream)
+    return [ImageOps.exif_transpose(frame).convert("RGB") for frame in ImageSequence.Iterator(image)]
+
+def downscale(image, max_side):
+    # EasyOCR time grows with pixel count while accuracy plateaus well below phone-camera resolution.
+    scale = max_side / max(image.size)
+    if scale >= 1: return image
+    return image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+
+def page_needs_ocr(text, min_chars):
+    return len(text.strip()) < min_chars
+
+def page_images(page, target_dpi):
+    # Scanned PDFs carry each page as an embedded image; rescale it to target_dpi for the page's width.
+    try:
+        files = page.images
+    except (KeyError, NotImplementedError, ValueError):
+        return []
+    width_inches = float(page.mediabox.width) / 72 or 1
+    images = []
+    for f in files:
+        try:
+            image = Image.open(io.BytesIO(f.data)).convert("RGB")
+        except Exception:
+            continue
+        dpi = image.width / width_inches
+        if dpi > target_dpi: image = downscale(image, round(max(image.size) * target_dpi / dpi))
+        images.append(image)
+    return images
+
+def reading_order(results):
+    # Sort paragraph blocks top-to-bottom, then left-to-right within a row.
+    if not results: return []
+    boxes = [(min(p[1] for p in box), min(p[0] for p in box), max(p[1] for p in box) - min(p[1] for p in box), text) for box, text, *_ in results]
+    row = max(1.0, float(np.median([h for _, _, h, _ in boxes])) / 2)
+    return [text for top, left, _, text in sorted(boxes, key=lambda b: (round(b[0] / row), b[1]))]
+
+def ocr_blocks(reader, image):
+    return reading_order(reader.readtext(np.asarray(image), paragraph=True))
@@ -0,0 +1,188 @@
+import asyncio, contextvars, json, time, logging
+from dataclasses import dataclass, asdict
+import httpx
+from langchain_ollama import ChatOllama
+from langchain_core.prompts import ChatPromptTemplate
+from generation import ContextOverflow, text_tokens
+
+logger = logging.getLogger(__name__)
+
+# Failures that mean "this server is unreachable", as opposed to a bad request or a model error.
+CONNECTION_ERRORS = (ConnectionError, httpx.TransportError)
+
+# Ollama reports token counts and timings (in nanoseconds) with the last message of every response.
+@dataclass
+class Usage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    prompt_seconds: float = 0.0
+    eval_seconds: float = 0.0
+    # Time Ollama spent loading the model into memory before it could answer; non-zero after a cold start or unload.
+    load_seconds: float = 0.0
+    truncated: int = 0                # generations stopped by num_predict rather than by the model
+
+    def add(self, info):
+        self.calls += 1
+        self.prompt_tokens += info.get("prompt_eval_count") or 0
+        self.completion_tokens += info.get("eval_count") or 0
+        self.prompt_seconds += (info.get("prompt_eval_duration") or 0) / 1e9
+        self.eval_seconds += (info.get("eval_duration") or 0) / 1e9
+        self.load_seconds += (info.get("load_duration") or 0) / 1e9
+        self.truncated += info.get("done_reason") == "length"
+
+    def stats(self):
+        return {**asdict(self), "tokens_per_second": self.completion_tokens / self.eval_seconds if self.eval_seconds else 0.0}
+
+_usage = contextvars.ContextVar("ollama_usage", default=None)
+
+def track_usage():
+    # Collects the Ollama calls made for the current request, including those in tasks it starts afterwards.
+    usage = Usage()
+    _usage.set(usage)
+    return usage
+
+class OllamaEndpoint:
+    def __init__(self, url, model, keep_alive=None):
+        self.url = url
+        # Each ChatOllama owns one ollama.AsyncClient, so connections to this server are kept alive and reused.
+        self.llm = ChatOllama(model=model, base_url=url, keep_alive=keep_alive)
+        self.in_flight = self.requests = self.failures = 0
+        self.usage = Usage()
+        self.healthy = True
+        self.last_error = None
+        self.checked_at = None
+
+    def record_usage(self, info):
+        if "eval_count" not in info: return
+        self.usage.add(info)
+        request = _usage.get()
+        if request is not None: request.add(info)
+
+# A set of Ollama servers serving the same model. Requests go to the healthy server with the fewest
+# requests in flight; servers that fail to connect are taken out until the next health check passes.
+class OllamaPool:
+    def __init__(self, urls, model, health_interval=15.0, keep_alive=None):
+        self.model, self.health_interval = model, health_interval
+        self.endpoints = [OllamaEndpoint(url.rstrip("/"), model, keep_alive) for url in urls]
+
+    def pick(self, exclude=()):
+        candidates = [e for e in self.endpoints if e.url not in exclude]
+        healthy = [e for e in candidates if e.healthy]
+        # If every server looks down, still try one rather than failing without a request.
+        return min(healthy or candidates, key=lambda e: e.in_flight)
+
+    def mark_down(self, endpoint, error):
+        endpoint.healthy, endpoint.last_error = False, str(error)
+        endpoint.failures += 1
+        logger.warning("Ollama endpoint %s marked unhealthy: %s", endpoint.url, error)
+
+    async def check_health(self, client):
+        async def check(endpoint):
+            try:
+                (await client.get(f"{endpoint.url}/api/tags")).raise_for_status()
+                endpoint.healthy, endpoint.last_error = True, None
+            except httpx.HTTPError as e:
+                if endpoint.healthy: self.mark_down(endpoint, e)
+            endpoint.checked_at = time.time()
+        await asyncio.gather(*(check(e) for e in self.endpoints))
+
+    async def health_loop(self):
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                await self.check_health(client)
+                await asyncio.sleep(self.health_interval)
+
+    def stats(self):
+        return [{
+            "url": e.url, "healthy": e.healthy, "in_flight": e.in_flight, "requests": e.requests, "failures": e.failures, "last_error": e.last_error,
+            **{k: v for k, v in e.usage.stats().items() if k != "calls"},
+        } for e in self.endpoints]
+
+# Stands in for `prompt | ChatOllama | StrOutputParser` but spreads calls over an OllamaPool.
+# Identical ainvoke calls that overlap in time share a single generation. With a GenerationProfile, every
+# call carries num_ctx and a num_predict sized from `expected_tokens(inputs)`, the expected output length.
+class PooledChain:
+    def __init__(self, prompt, pool, profile=None, expected_tokens=None):
+        self.pool, self.prompt, self.profile, self.expected_tokens = pool, prompt, profile, expected_tokens
+        self.template = ChatPromptTemplate.from_messages([("user", prompt)])
+        self._in_flight = {}
+        self.coalesced = 0
+
+    def options(self, inputs, full=False):
+        # full=True lets the output use all the room the context has left.
+        if self.profile is None: return None
+        prompt_tokens = text_tokens(self.prompt.format(**inputs), inputs.get("source_language"))
+        return self.profile.options(prompt_tokens, None if full or self.expected_tokens is None else self.expected_tokens(inputs))
+
+    def fits(self, inputs):
+        try:
+            self.options(inputs)
+            return True
+        except ContextOverflow:
+            return False
+
+    def _chain(self, endpoint, options):
+        return self.template | (endpoint.llm.bind(options=options) if options else endpoint.llm)
+
+    async def ainvoke(self, inputs):
+        key = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = self._in_flight[key] = asyncio.ensure_future(self._generate(inputs))
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield: one caller disconnecting must not cancel the generation the others are waiting on.
+        return await asyncio.shield(future)
+
+    async def _generate(self, inputs):
+        options = self.options(inputs)
+        message = await self._invoke(inputs, options)
+        if message.response_metadata.get("done_reason") == "length" and options and self.expected_tokens:
+            # The output outgrew its estimate; run it again with the rest of the context rather than return it cut off.
+            full = self.options(inputs, full=True)
+            if full["num_predict"] > options["num_predict"]:
+                logger.warning("Generation hit num_predict=%d; retrying with %d", options["num_predict"], full["num_predict"])
+                message = await self._invoke(inputs, full)
+        return message.content
+
+    async def _invoke(self, inputs, options):
+        tried = set()
+        while True:
+            endpoint = self.pool.pick(tried)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            try:
+                message = await self._chain(endpoint, options).ainvoke(inputs)
+                endpoint.record_usage(message.response_metadata)
+                return message
+            except CONNECTION_ERRORS as e:
+                self.pool.mark_down(endpoint, e)
+                tried.add(endpoint.url)
+                if len(tried) == len(self.pool.endpoints): raise
+            finally:
+                endpoint.in_flight -= 1
+
+    async def astream(self, inputs):
+        options = self.options(inputs)
+        tried = set()
+        while True:
+            endpoint = self.pool.pick(tried)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            started = False
+            try:
+                async for chunk in self._chain(endpoint, options).astream(inputs):
+                    endpoint.record_usage(chunk.response_metadata)
+                    if chunk.content:
+                        started = True
+                        yield chunk.content
+                return
+            except CONNECTION_ERRORS as e:
+                self.pool.mark_down(endpoint, e)
+                tried.add(endpoint.url)
+                # Once tokens have gone out we can't switch servers without duplicating output.
+                if started or len(tried) == len(self.pool.endpoints): raise
+            finally:
+                endpoint.in_flight -= 1
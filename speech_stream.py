@@ -0,0 +1,49 @@
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+def pcm16_to_float(data):
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+# Buffers microphone audio and cuts it into utterances at pauses found by VAD, so each utterance
+# can be transcribed as soon as the speaker stops instead of after the whole recording.
+class UtteranceSegmenter:
+    def __init__(self, vad, min_silence=0.5, max_utterance=15.0, check_every=0.5):
+        self.vad = vad  # callable(audio) -> [{"start": sample, "end": sample}, ...]
+        self.min_silence = int(min_silence * SAMPLE_RATE)
+        self.max_utterance = int(max_utterance * SAMPLE_RATE)
+        self.check_every = int(check_every * SAMPLE_RATE)
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.offset = 0          # absolute sample index of buffer[0]
+        self._unchecked = 0
+
+    def feed(self, pcm):
+        # Returns a list of (start_seconds, audio) for utterances that ended in this frame.
+        audio = pcm16_to_float(pcm)
+        self.buffer = np.concatenate([self.buffer, audio])
+        self._unchecked += len(audio)
+        if self._unchecked < self.check_every: return []
+        self._unchecked = 0
+        speech = self.vad(self.buffer)
+        if not speech:
+            # Nothing but silence so far: keep a short tail so a word that just started isn't clipped.
+            self._drop(max(0, len(self.buffer) - self.min_silence))
+            return []
+        end = speech[-1]["end"]
+        if len(self.buffer) - end >= self.min_silence or len(self.buffer) >= self.max_utterance:
+            cut = end if len(self.buffer) - end >= self.min_silence else len(self.buffer)
+            return [self._take(speech[0]["start"], cut)]
+        return []
+
+    def flush(self):
+        if len(self.buffer) and self.vad(self.buffer): return [self._take(0, len(self.buffer))]
+        return []
+
+    def _take(self, start, end):
+        utterance = (self.offset + start) / SAMPLE_RATE, self.buffer[start:end].copy()
+        self._drop(end)
+        return utterance
+
+    def _drop(self, n):
+        self.buffer = self.buffer[n:]
+        self.offset += n
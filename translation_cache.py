@@ -0,0 +1,87 @@
+import hashlib, json, sqlite3, threading, time, unicodedata
+from collections import OrderedDict
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def cache_key(text, source, target, tone, model, prompt):
+    payload = json.dumps([normalize_text(text), source, target, tone or "", model, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Two tiers: an in-process LRU in front of an SQLite store on disk. Values are translated strings.
+# A disk hit records its access time for eviction at most once per touch_interval, so reads rarely write.
+class TranslationCache:
+    def __init__(self, path, memory_entries=2048, disk_entries=200_000, ttl=30 * 86400, touch_interval=3600.0):
+        self.memory_entries, self.disk_entries, self.ttl, self.touch_interval = memory_entries, disk_entries, ttl, touch_interval
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            if entry: del self._lru[key]
+            if self._db:
+                row = self._db.execute("SELECT value, created, accessed FROM translations WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] < self.ttl:
+                    if now - row[2] >= self.touch_interval:
+                        self._db.execute("UPDATE translations SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+                if row:
+                    self._db.execute("DELETE FROM translations WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._disk_count -= 1
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db:
+                cur = self._db.execute("INSERT OR IGNORE INTO translations (key, value, created, accessed) VALUES (?, ?, ?, ?)", (key, value, now, now))
+                if cur.rowcount: self._disk_count += 1
+                else: self._db.execute("UPDATE translations SET value = ?, created = ?, accessed = ? WHERE key = ?", (value, now, now, key))
+                self._db.commit()
+                if self._disk_count > self.disk_entries: self._evict_disk()
+
+    def _remember(self, key, value, created):
+        self._lru[key] = (value, created)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self):
+        # Trim 10% below the limit so we don't pay for a DELETE on every insert.
+        expired = self._db.execute("DELETE FROM translations WHERE created < ?", (time.time() - self.ttl,)).rowcount
+        excess = max(0, self._disk_count - expired - int(self.disk_entries * 0.9))
+        self._db.execute("DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY accessed LIMIT ?)", (excess,))
+        self._db.commit()
+        self._disk_count -= expired + excess
+        self.evictions += expired + excess
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions, "memory_entries": len(self._lru), "disk_entries": self._disk_count if self._db else 0,
+            }
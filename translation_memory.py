@@ -0,0 +1,210 @@
+import difflib, hashlib, sqlite3, threading, time, zlib
+from dataclasses import dataclass
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+import numpy as np
+from translation_cache import normalize_text
+
+NUM_PERM, BANDS = 64, 16       # 16 bands of 4 rows: pairs above ~0.5 Jaccard similarity almost always share a band
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5                    # characters; works for scripts without spaces too
+_PRIME = (1 << 31) - 1
+# Fixed seed: signatures stored on disk have to stay comparable across restarts.
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY, source_language TEXT NOT NULL, target_language TEXT NOT NULL, tone TEXT NOT NULL,
+    source TEXT NOT NULL, target TEXT NOT NULL, norm TEXT NOT NULL, signature BLOB NOT NULL, origin TEXT NOT NULL,
+    created REAL NOT NULL, updated REAL NOT NULL, UNIQUE (source_language, target_language, tone, norm)
+);
+CREATE TABLE IF NOT EXISTS bands (key INTEGER NOT NULL, segment_id INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS bands_key ON bands (key);
+CREATE INDEX IF NOT EXISTS bands_segment ON bands (segment_id);
+CREATE INDEX IF NOT EXISTS segments_updated ON segments (updated);
+"""
+
+def shingles(norm):
+    text = norm.casefold()
+    if len(text) <= SHINGLE: return {text}
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+def minhash(norm):
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(norm)), dtype=np.uint64)
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+def band_keys(signature):
+    return [int.from_bytes(hashlib.blake2b(bytes([i]) + signature[i * ROWS:(i + 1) * ROWS].tobytes(), digest_size=8).digest(), "little", signed=True) for i in range(BANDS)]
+
+def _units(text):
+    # Words, or characters for text written without spaces. Matching words keeps long chunks fast.
+    words = text.casefold().split()
+    return words if len(words) * 10 >= len(text) else list(text.casefold())
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, _units(a), _units(b), autojunk=False).ratio()
+
+@dataclass
+class Match:
+    score: float
+    source: str
+    target: str
+    exact: bool = False  # an imported translation of the same text and language pair: reusable as is
+
+# Source/target segment pairs per language pair, indexed with MinHash LSH for fuzzy lookup. Unlike the
+# translation cache it is independent of model and prompt, and it can be filled from TMX files.
+# Imported entries have tone "" and are reused for any tone. Only they are returned as exact matches: the
+# model's own output is reused as is through the translation cache, which is keyed on model and prompt and
+# expires, and here it only serves as a reference. Model entries are also the only ones evicted, once older
+# than max_age or beyond max_entries; imported entries don't count towards that limit.
+class TranslationMemory:
+    def __init__(self, path, fuzzy_threshold=0.75, min_chars=20, candidates=3, scan=64, max_entries=500_000, max_age=180 * 86400):
+        self.fuzzy_threshold, self.min_chars, self.candidates, self.scan = fuzzy_threshold, min_chars, candidates, scan
+        self.max_entries, self.max_age = max_entries, max_age
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self.exact_hits = self.fuzzy_hits = self.misses = self.evictions = self._inserts = 0
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self._count = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            self._models = self._count_models()
+            self._evict()
+
+    def _count_models(self):
+        return self._db.execute("SELECT COUNT(*) FROM segments WHERE origin != 'import'").fetchone()[0]
+
+    def _exact(self, norm, source, target, tone):
+        row = self._db.execute(
+            "SELECT target FROM segments WHERE source_language = ? AND target_language = ? AND norm = ? AND tone IN (?, '') AND origin = 'import' ORDER BY tone = '' DESC, updated DESC LIMIT 1",
+            (source, target, norm, tone or "")).fetchone()
+        return row[0] if row else None
+
+    def exact(self, text, source, target, tone):
+        with self._lock:
+            out = self._exact(normalize_text(text), source, target, tone)
+            if out is None: self.misses += 1
+            else: self.exact_hits += 1
+            return out
+
+    def lookup(self, text, source, target, tone):
+        # Returns the closest stored segment scoring at least fuzzy_threshold, or None.
+        norm = normalize_text(text)
+        with self._lock:
+            out = self._exact(norm, source, target, tone)
+            if out is not None:
+                self.exact_hits += 1
+                return Match(1.0, norm, out, exact=True)
+        if len(norm) < self.min_chars:
+            with self._lock: self.misses += 1
+            return None
+        signature = minhash(norm)
+        keys = band_keys(signature)
+        with self._lock:
+            # Segments sharing the most bands first; common boilerplate can fill a bucket with thousands of rows.
+            rows = self._db.execute(
+                f"SELECT s.id, s.source, s.target, s.signature FROM bands b JOIN segments s ON s.id = b.segment_id "
+                f"WHERE b.key IN ({', '.join('?' * len(keys))}) AND s.source_language = ? AND s.target_language = ? "
+                f"GROUP BY s.id ORDER BY COUNT(*) DESC, s.updated DESC LIMIT ?",
+                (*keys, source, target, self.scan)).fetchall()
+        # Rank by estimated Jaccard similarity, then score only the best few exactly.
+        ranked = sorted(rows, key=lambda r: -np.mean(np.frombuffer(r[3], dtype=np.uint32) == signature))[:self.candidates]
+        best = max((Match(similarity(norm, normalize_text(r[1])), r[1], r[2]) for r in ranked), key=lambda m: m.score, default=None)
+        with self._lock:
+            if best is None or best.score < self.fuzzy_threshold:
+                self.misses += 1
+                return None
+            self.fuzzy_hits += 1
+        return best
+
+    def _insert(self, source_text, target_text, source, target, tone, origin, now):
+        norm = normalize_text(source_text)
+        if not norm or not target_text.strip(): return
+        cur = self._db.execute("UPDATE segments SET target = ?, source = ?, origin = ?, updated = ? WHERE source_language = ? AND target_language = ? AND tone = ? AND norm = ?",
+                               (target_text, source_text, origin, now, source, target, tone or "", norm))
+        if cur.rowcount: return
+        signature = minhash(norm)
+        cur = self._db.execute("INSERT INTO segments (source_language, target_language, tone, source, target, norm, signature, origin, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (source, target, tone or "", source_text, target_text, norm, signature.tobytes(), origin, now, now))
+        self._db.executemany("INSERT INTO bands (key, segment_id) VALUES (?, ?)", [(key, cur.lastrowid) for key in band_keys(signature)])
+        self._count += 1
+        self._models += origin != "import"
+        self._inserts += 1
+        if self._models > self.max_entries or self._inserts % 1000 == 0: self._evict()
+
+    def _evict(self):
+        # Drops model entries older than max_age, then the least recently updated ones down to 10% below
+        # max_entries, so we don't pay for a DELETE on every insert. Recounted here because an update can
+        # turn a model entry into an imported one.
+        self._models = self._count_models()
+        if not self._models: return
+        cutoff = time.time() - self.max_age
+        if self._models > self.max_entries:
+            excess = self._models - int(self.max_entries * 0.9)
+            row = self._db.execute("SELECT updated FROM segments WHERE origin != 'import' ORDER BY updated LIMIT 1 OFFSET ?", (excess - 1,)).fetchone()
+            cutoff = max(cutoff, row[0])
+        self._db.execute("DELETE FROM bands WHERE segment_id IN (SELECT id FROM segments WHERE origin != 'import' AND updated <= ?)", (cutoff,))
+        removed = self._db.execute("DELETE FROM segments WHERE origin != 'import' AND updated <= ?", (cutoff,)).rowcount
+        self._db.commit()
+        self._count -= removed
+        self._models -= removed
+        self.evictions += removed
+
+    def add(self, source_text, target_text, source, target, tone, origin="model"):
+        with self._lock:
+            self._insert(source_text, target_text, source, target, tone, origin, time.time())
+            self._db.commit()
+
+    def add_many(self, entries, origin="import", batch=500):
+        # entries: (source_text, target_text, source_language, target_language); committed every `batch` rows.
+        added = 0
+        for i, (source_text, target_text, source, target) in enumerate(entries, 1):
+            with self._lock:
+                self._insert(source_text, target_text, source, target, "", origin, time.time())
+                if i % batch == 0: self._db.commit()
+            added = i
+        with self._lock: self._db.commit()
+        return added
+
+    def entries(self, source=None, target=None):
+        sql, args = "SELECT source_language, target_language, source, target FROM segments", []
+        if source: sql, args = sql + " WHERE source_language = ?", [source]
+        if target: sql, args = sql + (" AND" if args else " WHERE") + " target_language = ?", args + [target]
+        with self._lock:
+            return self._db.execute(sql + " ORDER BY id", args).fetchall()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.fuzzy_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits, "fuzzy_hits": self.fuzzy_hits, "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.fuzzy_hits) / lookups if lookups else 0.0, "entries": self._count, "evictions": self.evictions,
+            }
+
+def write_tmx(entries, code):
+    # Yields a TMX 1.4 document piece by piece; `code` maps a language name to its ISO code.
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<tmx version="1.4">\n'
+    yield '<header creationtool="WordWeave" creationtoolversion="1.0" segtype="block" o-tmf="WordWeave" adminlang="en" srclang="*all*" datatype="plaintext"/>\n<body>\n'
+    for source, target, source_text, target_text in entries:
+        yield (f'<tu><tuv xml:lang={quoteattr(code(source))}><seg>{escape(source_text)}</seg></tuv>'
+               f'<tuv xml:lang={quoteattr(code(target))}><seg>{escape(target_text)}</seg></tuv></tu>\n')
+    yield '</body>\n</tmx>\n'
+
+def read_tmx(stream, language):
+    # Yields (source_text, target_text, source, target) for every ordered pair of variants in each <tu>.
+    # `language` maps a TMX language code to a language name, or None for languages we don't support.
+    for _, element in ElementTree.iterparse(stream):
+        if element.tag != "tu": continue
+        variants = []
+        for tuv in element.iter("tuv"):
+            name = language(tuv.get(XML_LANG) or tuv.get("lang") or "")
+            seg = tuv.find("seg")
+            text = "".join(seg.itertext()).strip() if seg is not None else ""
+            if name and text: variants.append((name, text))
+        for source, source_text in variants:
+            for target, target_text in variants:
+                if source != target: yield source_text, target_text, source, target
+        element.clear()
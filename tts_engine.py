@@ -0,0 +1,126 @@
+import abc, functools, io, shutil, subprocess, threading, wave
+from collections import OrderedDict
+from contextlib import nullcontext
+from chunking import split_sentences
+
+class TTSBackend(abc.ABC):
+    name = media_type = suffix = None
+
+    @abc.abstractmethod
+    def synthesize(self, text, lang): ...
+
+    def supports(self, lang):
+        return True
+
+    def stream_chunk(self, audio, first):
+        # Bytes to put on the wire for one sentence of a streamed response.
+        return audio
+
+    def concat(self, chunks):
+        return b"".join(chunks)
+
+@functools.cache
+def gtts_languages():
+    from gtts.lang import tts_langs
+    return frozenset(tts_langs())
+
+# Google Text-to-Speech. Needs network access; MP3 frames can be concatenated as-is.
+class GTTSBackend(TTSBackend):
+    name, media_type, suffix = "gtts", "audio/mpeg", ".mp3"
+
+    def synthesize(self, text, lang):
+        from gtts import gTTS
+        fp = io.BytesIO()
+        gTTS(text, lang=lang).write_to_fp(fp)
+        return fp.getvalue()
+
+    def supports(self, lang):
+        return lang in gtts_languages()
+
+# Offline synthesis through the espeak-ng command line tool.
+class EspeakBackend(TTSBackend):
+    name, media_type, suffix = "espeak", "audio/wav", ".wav"
+    VOICES = {"iw": "he", "zh-CN": "cmn", "zh-TW": "cmn"}  # gTTS-style codes that espeak-ng names differently
+
+    def __init__(self, binary="espeak-ng"):
+        self.binary = shutil.which(binary) or shutil.which("espeak")
+        if not self.binary: raise RuntimeError("espeak-ng is not installed")
+
+    def synthesize(self, text, lang):
+        voice = self.VOICES.get(lang, lang)
+        result = subprocess.run([self.binary, "--stdout", "-v", voice, text], capture_output=True, check=True, timeout=60)
+        return result.stdout
+
+    def stream_chunk(self, audio, first):
+        # A streamed WAV gets one header with an open-ended length, then raw PCM for every sentence.
+        with wave.open(io.BytesIO(audio)) as w:
+            params, frames = w.getparams(), w.readframes(w.getnframes())
+        if not first: return frames
+        header = io.BytesIO()
+        with wave.open(header, "wb") as out:
+            out.setparams(params)
+        header = bytearray(header.getvalue())
+        header[4:8] = header[40:44] = (0xFFFFFFFF).to_bytes(4, "little")
+        return bytes(header) + frames
+
+    def concat(self, chunks):
+        out = io.BytesIO()
+        with wave.open(out, "wb") as dst:
+            for i, chunk in enumerate(chunks):
+                with wave.open(io.BytesIO(chunk)) as src:
+                    if i == 0: dst.setparams(src.getparams())
+                    dst.writeframes(src.readframes(src.getnframes()))
+        return out.getvalue()
+
+TTS_BACKENDS = {"gtts": GTTSBackend, "espeak": EspeakBackend}
+
+# Byte-bounded LRU of synthesized sentences keyed by (backend, language, text).
+class AudioCache:
+    def __init__(self, max_bytes):
+        self.max_bytes, self.size = max_bytes, 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            audio = self._items.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def set(self, key, audio):
+        if len(audio) > self.max_bytes: return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None: self.size -= len(old)
+            self._items[key] = audio
+            self.size += len(audio)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0, "entries": len(self._items), "bytes": self.size}
+
+class TTSEngine:
+    def __init__(self, backend, cache, stage=None):
+        # `stage` is an optional context manager factory timing actual synthesis (cache hits excluded).
+        self.backend, self.cache, self.stage = backend, cache, stage or nullcontext
+
+    def sentences(self, text):
+        return split_sentences(text)
+
+    def synthesize_sentence(self, sentence, lang):
+        key = (self.backend.name, lang, sentence)
+        audio = self.cache.get(key)
+        if audio is None:
+            with self.stage():
+                audio = self.backend.synthesize(sentence, lang)
+            self.cache.set(key, audio)
+        return audio